@@ -226,7 +226,7 @@ def render(v1, v2, out):
     a1, a2 = {}, {}
     flatten_arrays("", t1 or {}, a1)
     flatten_arrays("", t2 or {}, a2)
-    keys = sorted(set(a1) | set(a2))
+    keys = sorted(a1.keys() | a2.keys())
 
     sections, links = [], []
     for k in keys:
@@ -305,7 +305,7 @@ def generate_html_diff(prod_path: Path, final_path: Path, output_path: Path):
     added = {k: v for k, v in new_actions.items() if k not in old_actions}
     deleted = {k: v for k, v in old_actions.items() if k not in new_actions}
     modified = {}
-    for k in set(old_actions) & set(new_actions):
+    for k in old_actions.keys() & new_actions.keys():
         if json.dumps(old_actions[k], sort_keys=True) != json.dumps(new_actions[k], sort_keys=True):
             modified[k] = (old_actions[k], new_actions[k])
 
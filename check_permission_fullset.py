@@ -3,7 +3,10 @@
 
 import argparse, io, json, os, re, zipfile
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 
 # ============================================================
@@ -41,6 +44,8 @@ ACTION_WHITELIST = {
     "action:party/arrangement/view",
 }
 
+VERSIONS_RE = re.compile(r"(?i)\.VERSIONS\.([^.]+)")
+
 OUTPUT_COL_ORDER = [
     "position_path","originId","type","name",
     "full_path_from_root","full_path_ids_from_root",
@@ -65,16 +70,38 @@ def write_html_table(df: pd.DataFrame, title: str, out_html: str):
             f"<h2>{esc(title)}</h2><table><thead><tr>",
             "".join(f"<th>{esc(c)}</th>" for c in cols),
             "</tr></thead><tbody>"]
-    for _, r in df.iterrows():
+    # Format column-by-column, then stitch rows together (no per-row Series boxing)
+    cells = []
+    for c in cols:
+        col = df[c]
+        vals = ["" if na else esc(s) for na, s in zip(col.isna().tolist(), col.astype(str).tolist())]
+        if c.lower().endswith("id"):
+            cells.append([f"<td><code>{v}</code></td>" for v in vals])
+        else:
+            cells.append([f"<td>{v}</td>" for v in vals])
+    for row in zip(*cells):
         html.append("<tr>")
-        for c in cols:
-            sval = "" if pd.isna(r[c]) else str(r[c])
-            html.append(f"<td>{esc(sval) if not c.lower().endswith('id') else '<code>'+esc(sval)+'</code>'}</td>")
+        html.extend(row)
         html.append("</tr>")
     html.append("</tbody></table></body></html>")
     with open(out_html, "w", encoding="utf-8") as f:
         f.write("\n".join(html))
 
+def map_unique(col: pd.Series, fn) -> pd.Series:
+    # Evaluate fn once per distinct value (paths/targets repeat heavily) and broadcast back by code
+    codes, uniques = pd.factorize(col, sort=False)
+    mapped = np.empty(len(uniques) + 1, dtype=object)  # code -1 (missing) -> last slot, filled below
+    for i, u in enumerate(uniques):
+        mapped[i] = fn(u)
+    out = mapped[codes]
+    missing = np.flatnonzero(codes == -1)
+    if missing.size:
+        # Like Series.apply: fn only sees missing values that are actually there, as stored
+        values = col.to_numpy(dtype=object)
+        for i in missing:
+            out[i] = fn(values[i])
+    return pd.Series(out, index=col.index, name=col.name)
+
 def load_json_or_zipped_json(path: str):
     with open(path, "rb") as f:
         head = f.read(4); f.seek(0); blob = f.read()
@@ -116,10 +143,15 @@ def get_name(o: dict) -> Optional[str]:
 # ==========================
 
 def build_metadata_maps(objs: List[dict]):
-    md = [o for o in objs if o.get("class")=="Metadata"]
-    md_by_origin = {o["originId"]: o for o in md if "originId" in o}
-    policysets = {o["originId"] for o in md if o.get("originType")=="PolicySet"}
-    policies   = {o["originId"] for o in md if o.get("originType")=="Policy"}
+    # Single pass over objs; no intermediate Metadata list
+    md_by_origin, policysets, policies = {}, set(), set()
+    for o in objs:
+        if o.get("class")!="Metadata" or "originId" not in o: continue
+        oid = o["originId"]
+        md_by_origin[oid] = o
+        ot = o.get("originType")
+        if ot=="PolicySet": policysets.add(oid)
+        elif ot=="Policy": policies.add(oid)
     return md_by_origin, policysets, policies
 
 def resolve_policyset_graph(objs, id_index, policysets):
@@ -248,10 +280,9 @@ def build_policypath_from_package(pkg_path: str) -> pd.DataFrame:
 # ==========================
 
 def build_indices(objs):
-    by_id, fwd, rev = {}, defaultdict(set), defaultdict(set)
-    for o in objs:
-        oid = o.get("id")
-        if oid: by_id[oid]=o
+    by_id = index_by_id(objs)
+    # Accumulate edges in lists and convert once at the end (no incremental set resizing)
+    fwd_l, rev_l = defaultdict(list), defaultdict(list)
     singles = ("inputNode","guardNode","lhsInputNode","rhsInputNode","condition","definitionId")
     for o in objs:
         oid = o.get("id")
@@ -259,17 +290,15 @@ def build_indices(objs):
         for k in singles:
             v = o.get(k)
             if isinstance(v, str) and v in by_id:
-                fwd[oid].add(v); rev[v].add(oid)
+                fwd_l[oid].append(v); rev_l[v].append(oid)
         for v in (o.get("inputNodes") or []):
             if isinstance(v, str) and v in by_id:
-                fwd[oid].add(v); rev[v].add(oid)
+                fwd_l[oid].append(v); rev_l[v].append(oid)
+    fwd = defaultdict(set, ((k, set(v)) for k, v in fwd_l.items()))
+    rev = defaultdict(set, ((k, set(v)) for k, v in rev_l.items()))
     return by_id, fwd, rev
 
-def strictly_match_metadata(cond_id, by_id, fwd, rev, objs):
-    meta = {"PolicySet":{}, "Policy":{}}
-    for o in objs:
-        if o.get("class")=="Metadata" and o.get("originId") and o.get("originType") in ("PolicySet","Policy"):
-            meta[o["originType"]][o["originId"]] = o
+def strictly_match_metadata(cond_id, by_id, rev, md_by_origin, policysets, policies):
     crs = [nid for nid in rev.get(cond_id,set()) if by_id.get(nid,{}).get("class")=="ConditionReferenceNode"]
     if not crs: return []
     bools=set()
@@ -292,19 +321,13 @@ def strictly_match_metadata(cond_id, by_id, fwd, rev, objs):
     holders = [by_id[c] for c in combs] + [by_id[s] for s in statements] + [by_id[t] for t in targets]
     out, seen=set(), set()
     for node in holders:
+        vals = [node.get("metadataId")]
         if node.get("class")=="CombinedDecisionNode":
-            v = node.get("originLink")
-            if isinstance(v,str):
-                for t in ("PolicySet","Policy"):
-                    m = meta[t].get(v)
-                    if m and v not in seen:
-                        out.add((get_name(m), m.get("originType"), v)); seen.add(v)
-        v = node.get("metadataId")
-        if isinstance(v,str):
-            for t in ("PolicySet","Policy"):
-                m = meta[t].get(v)
-                if m and v not in seen:
-                    out.add((get_name(m), m.get("originType"), v)); seen.add(v)
+            vals.insert(0, node.get("originLink"))
+        for v in vals:
+            if isinstance(v,str) and v and v not in seen and (v in policysets or v in policies):
+                m = md_by_origin[v]
+                out.add((get_name(m), m.get("originType"), v)); seen.add(v)
     return list(out)
 
 def const_str(node):
@@ -372,7 +395,7 @@ def find_action_for_policy_condition(policy_cd, by_id):
 
 def extract_version_from_target(name: str) -> str:
     if not isinstance(name, str): return ""
-    m = re.search(r"(?i)\.VERSIONS\.([^.]+)", name)
+    m = VERSIONS_RE.search(name)
     return (m.group(1) if m else "")
 
 def normalize_linked_target(name: str) -> str:
@@ -450,18 +473,43 @@ def normalize_to_whitelist(ac_value: str, cd_name: str = "") -> str:
     # No confident match -> empty (so toggle_path won't build)
     return ""
 
-def build_actionlink_from_package(pkg_path: str) -> pd.DataFrame:
+# Per-process graph state for condition workers (set once by the pool initializer, not pickled per task)
+_CD_STATE = {}
+
+def _init_cd_worker(by_id, rev, md_by_origin, policysets, policies):
+    _CD_STATE.update(by_id=by_id, rev=rev, md_by_origin=md_by_origin, policysets=policysets, policies=policies)
+
+def _match_cd(st, cond_id):
+    links = strictly_match_metadata(cond_id, st["by_id"], st["rev"], st["md_by_origin"], st["policysets"], st["policies"])
+    consts, _ = find_action_for_policy_condition(st["by_id"][cond_id], st["by_id"])
+    return links, consts
+
+def _process_cd(cond_id):
+    return _match_cd(_CD_STATE, cond_id)
+
+def build_actionlink_from_package(pkg_path: str, workers: Optional[int] = None) -> pd.DataFrame:
     objs = list(iter_nodes(load_json_or_zipped_json(pkg_path)))
     by_id, fwd, rev = build_indices(objs)
+    md_by_origin, policysets, policies = build_metadata_maps(objs)
     conds = [o for o in objs if o.get("class")=="ConditionDefinition"
              and isinstance(o.get("name"),str) and o.get("id")
              and ("CHECK_PERMISSIONS" in o["name"] and ".ACTION." in o["name"])]
 
+    # Conditions are independent graph walks: serial unless processes are asked for
+    cond_ids = [cd["id"] for cd in conds]
+    if not workers or workers <= 1:
+        st = dict(by_id=by_id, rev=rev, md_by_origin=md_by_origin, policysets=policysets, policies=policies)
+        results = [_match_cd(st, cid) for cid in cond_ids]
+    else:
+        state = (by_id, rev, md_by_origin, policysets, policies)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_cd_worker, initargs=state) as ex:
+            results = list(ex.map(_process_cd, cond_ids, chunksize=64))
+
     # Strict links to Policy/PolicySet
     rows_links=[]
-    for cd in conds:
+    for cd, (links, _) in zip(conds, results):
         cid, cname = cd["id"], get_name(cd) or ""
-        for nm,tp,oid in strictly_match_metadata(cid, by_id, fwd, rev, objs):
+        for nm,tp,oid in links:
             rows_links.append({"ConditionID": cid, "Linked POLICY.Target": cname,
                                "Linked PolicySet/Policy": nm or "", "Matched Type": tp or "",
                                "Matched OriginID": oid or ""})
@@ -469,8 +517,7 @@ def build_actionlink_from_package(pkg_path: str) -> pd.DataFrame:
 
     # Find ALL actions (prefer graph constants; fallback to name parsing)
     rows_actions=[]
-    for cd in conds:
-        consts, _ = find_action_for_policy_condition(cd, by_id)
+    for cd, (_, consts) in zip(conds, results):
         if not consts:
             lt = get_name(cd) or ""
             m = re.search(r"(?i)\.ACTION\.([^.]+(?:\.[^.]+)*)", lt)
@@ -490,14 +537,14 @@ def build_actionlink_from_package(pkg_path: str) -> pd.DataFrame:
 
     # Merge and add Version; normalize Linked POLICY.Target
     df = pd.merge(df_links, df_actions, on=["ConditionID","Linked POLICY.Target"], how="left")
-    df["Linked POLICY.Target"] = df["Linked POLICY.Target"].astype(str).apply(normalize_linked_target)
-    df["Version"] = df["Linked POLICY.Target"].apply(extract_version_from_target)
+    df["Linked POLICY.Target"] = map_unique(df["Linked POLICY.Target"].astype(str), normalize_linked_target)
+    df["Version"] = map_unique(df["Linked POLICY.Target"], extract_version_from_target)
 
     # Ensure only whitelisted actions remain; others -> ""
     def enforce_whitelist(v: str) -> str:
         v = (v or "").strip().lower()
         return v if v in ACTION_WHITELIST else ""
-    df["Action Constant"] = df["Action Constant"].apply(enforce_whitelist)
+    df["Action Constant"] = map_unique(df["Action Constant"], enforce_whitelist)
 
     return df[["ConditionID","Linked POLICY.Target","Linked PolicySet/Policy","Matched OriginID","Action Constant","Version"]]
 
@@ -544,11 +591,6 @@ def subtype_from_linked_target(target: str) -> str:
         return ""
     return val
 
-def extract_version_from_target(name: str) -> str:
-    if not isinstance(name, str): return ""
-    m = re.search(r"(?i)\.VERSIONS\.([^.]+)", name)
-    return (m.group(1) if m else "")
-
 def path_key(s):
     try:
         return tuple(int(x) for x in str(s).split("."))
@@ -559,7 +601,8 @@ def norm_action(v):
     return v.strip() if isinstance(v, str) and v.strip().lower().startswith("action:") else ""
 
 def propagate_action_in_place(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.sort_values(by="position_path", key=lambda c: c.map(path_key)).reset_index(drop=True)
+    key_of = lru_cache(maxsize=None)(path_key)  # repeated paths parse once; dropped with this call
+    df = df.sort_values(by="position_path", key=lambda c: c.map(key_of)).reset_index(drop=True)
     stack, out_vals = [], []
     for _, row in df.iterrows():
         depth = len(str(row["position_path"]).split("."))
@@ -572,43 +615,61 @@ def propagate_action_in_place(df: pd.DataFrame) -> pd.DataFrame:
     df["Action Constant"] = out_vals
     return df
 
-def build_toggle_path(row) -> str:
-    ac = str(row.get("Action Constant","") or "").strip()
-    if not ac:
-        return ""
-    parts = [
-        ac,
-        str(row.get("Tenancy_Mapped","") or "").strip(),
-        str(row.get("SubTenancy_Mapped","") or "").strip(),
-        str(row.get("subtenancy_subtype","") or "").strip(),
-    ]
-    ver = str(row.get("Version","") or "").strip()
-    if ver:
-        parts.append(ver)
-    # EXACTLY no spaces around "~", skip empties
-    return "~".join([p for p in parts if p])
+def build_toggle_paths(df: pd.DataFrame) -> np.ndarray:
+    # Column-wise instead of df.apply(axis=1): pull the five inputs out as arrays once
+    n = len(df)
+    def col(name):
+        return df[name].to_numpy() if name in df.columns else np.full(n, "", dtype=object)
+    ac_c, tm_c, stm_c, sst_c, ver_c = (col(c) for c in
+        ("Action Constant","Tenancy_Mapped","SubTenancy_Mapped","subtenancy_subtype","Version"))
+    out = np.empty(n, dtype=object)
+    for i in range(n):
+        ac = str(ac_c[i] or "").strip()
+        if not ac:
+            out[i] = ""
+            continue
+        parts = [
+            ac,
+            str(tm_c[i] or "").strip(),
+            str(stm_c[i] or "").strip(),
+            str(sst_c[i] or "").strip(),
+            str(ver_c[i] or "").strip(),
+        ]
+        # EXACTLY no spaces around "~", skip empties
+        out[i] = "~".join([p for p in parts if p])
+    return out
 
 # ==========================
 # Orchestration
 # ==========================
 
-def run_from_package(pkg_path: str, out_dir: str):
+def dedupe_by_origin(df: pd.DataFrame) -> pd.DataFrame:
+    # One row per originId (lowest position_path, ties -> first seen); frame order is left untouched
+    codes, _ = pd.factorize(df["originId"], sort=False)
+    pp = df["position_path"]
+    # read_csv gives int64/float64 when no path has a dot; sort those numerically like sort_values
+    keys = pp.astype(str).to_numpy() if pp.dtype == object or pd.api.types.is_string_dtype(pp) else pp.to_numpy()
+    order = np.argsort(keys, kind="stable")
+    _, first = np.unique(codes[order], return_index=True)
+    return df.take(np.sort(order[first]))
+
+def run_from_package(pkg_path: str, out_dir: str, workers: Optional[int] = None):
     # Build datasets
     df_policy = build_policypath_from_package(pkg_path)
-    df_action = build_actionlink_from_package(pkg_path)
+    df_action = build_actionlink_from_package(pkg_path, workers=workers)
 
     # Join
     df = df_policy.merge(df_action, left_on="originId", right_on="Matched OriginID", how="left")
 
     # Deduplicate by originId (keep first by position_path)
     if df["originId"].duplicated().any():
-        df = df.sort_values(["position_path"]).drop_duplicates(subset=["originId"], keep="first")
+        df = dedupe_by_origin(df)
 
     # Tenancy/Subtenancy/subtype
-    df["Tenancy_Mapped"] = df["full_path_from_root"].apply(tenancy_from_path).apply(trim_users_suffix)
-    df["SubTenancy_Mapped"] = df["full_path_from_root"].apply(white_label_subtenancy)
+    df["Tenancy_Mapped"] = map_unique(df["full_path_from_root"], lambda p: trim_users_suffix(tenancy_from_path(p)))
+    df["SubTenancy_Mapped"] = map_unique(df["full_path_from_root"], white_label_subtenancy)
     if "Linked POLICY.Target" not in df.columns: df["Linked POLICY.Target"] = ""
-    df["subtenancy_subtype"] = df["Linked POLICY.Target"].apply(subtype_from_linked_target)
+    df["subtenancy_subtype"] = map_unique(df["Linked POLICY.Target"], subtype_from_linked_target)
 
     # Overwrite SubTenancy_Mapped with subtype if present and not arrangementtype.*
     mask_subtype = df["subtenancy_subtype"].astype(str).str.len() > 0
@@ -616,7 +677,8 @@ def run_from_package(pkg_path: str, out_dir: str):
     df.loc[mask_subtype & mask_not_arr, "SubTenancy_Mapped"] = df.loc[mask_subtype & mask_not_arr, "subtenancy_subtype"]
 
     # Never allow raw tenancy keywords as entire SubTenancy_Mapped
-    df["SubTenancy_Mapped"] = df["SubTenancy_Mapped"].apply(
+    df["SubTenancy_Mapped"] = map_unique(
+        df["SubTenancy_Mapped"],
         lambda s: ("" if isinstance(s, str) and s.strip().lower() in {"edge","ib","nabc","nabone","opendata"} else s)
     )
 
@@ -630,13 +692,13 @@ def run_from_package(pkg_path: str, out_dir: str):
             df.drop(columns=[c], inplace=True)
 
     # Ensure Version (from Linked POLICY.Target)
-    df["Version"] = df["Linked POLICY.Target"].apply(extract_version_from_target)
+    df["Version"] = map_unique(df["Linked POLICY.Target"], extract_version_from_target)
 
     # No NaN
     df = df.fillna("")
 
     # toggle_path (only when AC exists), no spaces around "~"
-    df["toggle_path"] = df.apply(build_toggle_path, axis=1)
+    df["toggle_path"] = build_toggle_paths(df)
 
     # Order columns (keep extras at end)
     ordered = [c for c in OUTPUT_COL_ORDER if c in df.columns] + [c for c in df.columns if c not in OUTPUT_COL_ORDER]
@@ -658,21 +720,22 @@ def run_from_csvs(pp_csv: str, al_csv: str, out_dir: str):
         v = (str(v or "")).strip().lower()
         return v if v in ACTION_WHITELIST else ""
     if "Action Constant" in df_action.columns:
-        df_action["Action Constant"] = df_action["Action Constant"].apply(enforce_whitelist)
+        df_action["Action Constant"] = map_unique(df_action["Action Constant"], enforce_whitelist)
 
     df = df_policy.merge(df_action, left_on="originId", right_on="Matched OriginID", how="left")
 
     if "position_path" in df.columns and df["originId"].duplicated().any():
-        df = df.sort_values(["position_path"]).drop_duplicates(subset=["originId"], keep="first")
+        df = dedupe_by_origin(df)
 
-    df["Tenancy_Mapped"] = df["full_path_from_root"].apply(tenancy_from_path).apply(trim_users_suffix)
-    df["SubTenancy_Mapped"] = df["full_path_from_root"].apply(white_label_subtenancy)
+    df["Tenancy_Mapped"] = map_unique(df["full_path_from_root"], lambda p: trim_users_suffix(tenancy_from_path(p)))
+    df["SubTenancy_Mapped"] = map_unique(df["full_path_from_root"], white_label_subtenancy)
     if "Linked POLICY.Target" not in df.columns: df["Linked POLICY.Target"] = ""
-    df["subtenancy_subtype"] = df["Linked POLICY.Target"].apply(subtype_from_linked_target)
+    df["subtenancy_subtype"] = map_unique(df["Linked POLICY.Target"], subtype_from_linked_target)
     mask_subtype = df["subtenancy_subtype"].astype(str).str.len() > 0
     mask_not_arr = ~df["subtenancy_subtype"].astype(str).str.startswith("arrangementtype")
     df.loc[mask_subtype & mask_not_arr, "SubTenancy_Mapped"] = df.loc[mask_subtype & mask_not_arr, "subtenancy_subtype"]
-    df["SubTenancy_Mapped"] = df["SubTenancy_Mapped"].apply(
+    df["SubTenancy_Mapped"] = map_unique(
+        df["SubTenancy_Mapped"],
         lambda s: ("" if isinstance(s, str) and s.strip().lower() in {"edge","ib","nabc","nabone","opendata"} else s)
     )
 
@@ -683,9 +746,9 @@ def run_from_csvs(pp_csv: str, al_csv: str, out_dir: str):
         if c in df.columns:
             df.drop(columns=[c], inplace=True)
 
-    df["Version"] = df["Linked POLICY.Target"].apply(extract_version_from_target)
+    df["Version"] = map_unique(df["Linked POLICY.Target"], extract_version_from_target)
     df = df.fillna("")
-    df["toggle_path"] = df.apply(build_toggle_path, axis=1)
+    df["toggle_path"] = build_toggle_paths(df)
 
     ordered = [c for c in OUTPUT_COL_ORDER if c in df.columns] + [c for c in df.columns if c not in OUTPUT_COL_ORDER]
     df = df[ordered]
@@ -706,6 +769,7 @@ def main():
     ap.add_argument("--policy-path-csv", help="PolicyPath_dataset.csv (optional mode)")
     ap.add_argument("--actionlink-csv", help="actionlink_dataset.csv (optional mode)")
     ap.add_argument("--out-dir", default=".", help="Output directory")
+    ap.add_argument("--workers", type=int, default=None, help="Processes for condition matching (default: 1 = serial)")
     args = ap.parse_args()
 
     out_dir = os.path.abspath(args.out_dir); os.makedirs(out_dir, exist_ok=True)
@@ -715,7 +779,7 @@ def main():
         return
 
     if args.package:
-        run_from_package(args.package, out_dir)
+        run_from_package(args.package, out_dir, workers=args.workers)
         return
 
     raise SystemExit("Provide either --package OR both --policy-path-csv and --actionlink-csv.")
@@ -2,10 +2,19 @@
 from __future__ import annotations
 import argparse
 import json
-from collections import defaultdict
+import os
+import re
+from functools import lru_cache
 from html import escape
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import orjson  # optional speed-up for parsing and string leaves
+except ImportError:
+    orjson = None
+
+_LONG_DIGITS = re.compile(rb"\d{19}")  # may not fit a 64-bit int; see load_json
 
 CSS = """
 <style>
@@ -39,94 +48,171 @@ CSS = """
 </style>
 """
 
-def tr(row_class: str, cells: List[str]) -> str:
-    tds = "".join("<td>" + c + "</td>" for c in cells)
-    cls = " class='" + row_class + "'" if row_class else ""
-    return "<tr" + cls + ">" + tds + "</tr>"
+def tr5(cls: str, c0: str, c1: str, c2: str, c3: str, c4: str) -> str:
+    # Group tables always have five cells; one f-string builds the row in a single allocation
+    return f"<tr class='{cls}'><td>{c0}</td><td>{c1}</td><td>{c2}</td><td>{c3}</td><td>{c4}</td></tr>"
 
 # ---------- RAW JSON WITH HIGHLIGHTS (fixed for removed/added composites) ----------
 
+@lru_cache(maxsize=4096, typed=True)  # typed: keep True/1/1.0 apart
+def _dump_primitive(v: Any) -> str:
+    # orjson only for strings: its float formatting (1e16 vs 1e+16) differs from json.dumps
+    if orjson is not None and type(v) is str:
+        try:
+            return escape(orjson.dumps(v).decode("utf-8"))
+        except orjson.JSONEncodeError:  # lone surrogates
+            pass
+    return escape(json.dumps(v, ensure_ascii=False))
+
 def _json_value_html(v: Any, is_changed: bool) -> str:
     if v == "(missing)":
         return "<span class='missing'>(missing)</span>"
-    token = json.dumps(v, ensure_ascii=False)
-    token = escape(token)
+    if type(v) is float:  # not cached: -0.0 == 0.0 would share an entry
+        token = json.dumps(v)
+    else:
+        try:
+            token = _dump_primitive(v)
+        except TypeError:  # unhashable
+            token = escape(json.dumps(v, ensure_ascii=False))
     return f"<span class='value-diff'>{token}</span>" if is_changed else token
 
+_COMPOSITE = (dict, list)
+
+def _dirty_prefixes(paths: Iterable[str]) -> Set[str]:
+    """Every path that may have a changed path at or below it. Cutting at each '.'/'[' can add
+       prefixes that are not real paths (keys containing those characters); that only costs speed."""
+    dirty: Set[str] = set()
+    for path in paths:
+        if path in dirty:
+            continue
+        dirty.add(path)
+        dirty.add("")
+        for i, ch in enumerate(path):
+            if ch == "." or ch == "[":
+                dirty.add(path[:i])
+    return dirty
+
 def _json_pretty_html(
     obj: Any,
-    changed_paths: Set[str],
-    whole_highlight: Set[str],
+    changes: Dict[str, Tuple[bool, bool]],
+    dirty: Set[str],
+    side: int,
     base_path: str,
     indent: str,
     level: int,
-) -> str:
-    """Pretty-print JSON with:
-       - leaf value highlights when path ∈ changed_paths
-       - whole block highlights (dict/list) when base_path ∈ whole_highlight
+    out: List[str],
+) -> None:
+    """Pretty-print JSON into `out` (appended fragments, joined once by the caller) with:
+       - leaf value highlights when path ∈ changes
+       - whole block highlights (dict/list) when changes[base_path][side] is set
+       Subtrees with nothing to highlight (base_path ∉ dirty) go to the C json encoder in one call.
     """
-    sp = indent * level
-    sp2 = indent * (level + 1)
-
-    # Dict
-    if isinstance(obj, dict):
-        items = list(obj.items())
-        if not items:
-            rendered = "{}"
-        else:
-            lines = ["{"]
-            for i, (k, v) in enumerate(items):
+    is_dict = isinstance(obj, dict)
+    if not is_dict and not isinstance(obj, list):
+        # Primitive
+        out.append(_json_value_html(obj, base_path in changes))
+        return
+
+    if base_path not in dirty:
+        text = json.dumps(obj, indent=indent, ensure_ascii=False)
+        # "(missing)" gets the missing badge, and any backslash escape may sit in a key, which
+        # the walk below writes raw: leave both to the walk
+        if '"(missing)"' not in text and "\\" not in text:
+            if level:
+                text = text.replace("\n", "\n" + indent * level)  # strings escape their own newlines
+            out.append(escape(text))
+            return
+
+    # If this whole composite path changed (removed/added/type-change), wrap the block in red
+    flags = changes.get(base_path) if base_path else None
+    wrap = flags is not None and flags[side]
+    if wrap:
+        out.append("<span class='value-diff'>")
+
+    if not obj:
+        out.append("{}" if is_dict else "[]")
+    else:
+        sp = indent * level
+        sp2 = "\n" + indent * (level + 1)
+        last = len(obj) - 1
+        out.append("{" if is_dict else "[")
+        items = obj.items() if is_dict else enumerate(obj)
+        for i, (k, v) in enumerate(items):
+            out.append(sp2)
+            if is_dict:
                 path_k = f"{base_path}.{k}" if base_path else k
-                key_html = '"' + escape(str(k)) + '"'
-                if isinstance(v, (dict, list)):
-                    val_html = _json_pretty_html(v, changed_paths, whole_highlight, path_k, indent, level + 1)
-                else:
-                    val_html = _json_value_html(v, path_k in changed_paths)
-                comma = "," if i < len(items) - 1 else ""
-                lines.append(f"{sp2}{key_html}: {val_html}{comma}")
-            lines.append(f"{sp}}}")
-            rendered = "\n".join(lines)
-        # If this whole composite path changed (removed/added/type-change), wrap the block in red
-        return f"<span class='value-diff'>{rendered}</span>" if (base_path in whole_highlight and base_path != "") else rendered
-
-    # List
-    if isinstance(obj, list):
-        if not obj:
-            rendered = "[]"
-        else:
-            lines = ["["]
-            for i, item in enumerate(obj):
-                ipath = f"{base_path}[{i}]"
-                if isinstance(item, (dict, list)):
-                    item_html = _json_pretty_html(item, changed_paths, whole_highlight, ipath, indent, level + 1)
-                else:
-                    item_html = _json_value_html(item, ipath in changed_paths)
-                comma = "," if i < len(obj) - 1 else ""
-                lines.append(f"{sp2}{item_html}{comma}")
-            lines.append(f"{sp}]")
-            rendered = "\n".join(lines)
-        return f"<span class='value-diff'>{rendered}</span>" if (base_path in whole_highlight and base_path != "") else rendered
-
-    # Primitive
-    return _json_value_html(obj, base_path in changed_paths)
+                out.append('"')
+                out.append(escape(str(k)))
+                out.append('": ')
+            else:
+                path_k = f"{base_path}[{k}]"
+            if isinstance(v, _COMPOSITE):
+                _json_pretty_html(v, changes, dirty, side, path_k, indent, level + 1, out)
+            else:
+                out.append(_json_value_html(v, path_k in changes))
+            if i < last:
+                out.append(",")
+        out.append("\n")
+        out.append(sp)
+        out.append("}" if is_dict else "]")
+
+    if wrap:
+        out.append("</span>")
 
 def render_json_raw_with_highlights(
     obj: Any,
-    changed_paths: Set[str],
-    whole_highlight: Set[str] | None = None,
+    changes: Optional[Dict[str, Tuple[bool, bool]]] = None,
+    side: int = 0,
     base_path: str = "",
     indent: str = "  ",
+    dirty: Optional[Set[str]] = None,
 ) -> str:
-    whole = whole_highlight or set()
-    html = _json_pretty_html(obj, changed_paths, whole, base_path, indent, 0)
-    return "<pre class='json-raw'>" + html + "</pre>"
+    changes = changes or {}
+    if dirty is None:
+        dirty = _dirty_prefixes(changes)
+    out: List[str] = ["<pre class='json-raw'>"]
+    _json_pretty_html(obj, changes, dirty, side, base_path, indent, 0, out)
+    out.append("</pre>")
+    return "".join(out)
+
+def _detail_value_html(v: Any) -> str:
+    if v == "(missing)":
+        return "<span class='missing'>(missing)</span>"
+    return "<span class='value-diff'>" + escape(v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)) + "</span>"
+
+def render_pair(
+    v1: Any, v2: Any, diffs: List[Tuple[str, Any, Any]]
+) -> Tuple[str, str, List[Tuple[str, str, str]]]:
+    """Render both sides of a modified item and its details rows from one pass over `diffs`."""
+    # path -> (wrap block on v1 side, wrap block on v2 side): a composite is highlighted whole
+    # when it is missing on the other side or involved in a dict/list type change
+    changes: Dict[str, Tuple[bool, bool]] = {}
+    details: List[Tuple[str, str, str]] = []
+    for path, old, new in diffs:
+        if path not in changes:
+            retyped = type(old) is not type(new) and (isinstance(old, _COMPOSITE) or isinstance(new, _COMPOSITE))
+            changes[path] = (retyped or new == "(missing)", retyped or old == "(missing)")
+        details.append((path, _detail_value_html(old), _detail_value_html(new)))
+    dirty = _dirty_prefixes(changes)
+    return (render_json_raw_with_highlights(v1, changes, side=0, dirty=dirty),
+            render_json_raw_with_highlights(v2, changes, side=1, dirty=dirty),
+            details)
 
 # -----------------------
 # JSON helpers
 # -----------------------
 
 def load_json(path: Path) -> Any:
-    return json.loads(path.read_text(encoding="utf-8", errors="replace"))
+    raw = path.read_bytes()
+    if orjson is not None:
+        # orjson turns integers outside 64 bits into floats instead of failing, so any
+        # 19+ digit run (possibly one inside a string) goes to the stdlib instead
+        if not _LONG_DIGITS.search(raw):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass  # invalid UTF-8, NaN/Infinity: let the stdlib decide
+    return json.loads(raw.decode("utf-8", errors="replace"))
 
 def find_first_key(root: Any, key: str) -> Optional[Any]:
     if isinstance(root, dict):
@@ -143,44 +229,74 @@ def find_first_key(root: Any, key: str) -> Optional[Any]:
                 return found
     return None
 
-def locate_arbitrary_services(root: Any) -> Optional[List[Dict[str, Any]]]:
+_LOCATOR_KEYS = ("arbitrary", "checkPermissions", "getPermissions")
+
+def find_first_keys(root: Any, keys: Iterable[str]) -> Dict[str, Any]:
+    remaining = set(keys)
+    found: Dict[str, Any] = {}
+    stack = [root]
+    while stack and remaining:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for k in node.keys() & remaining:
+                if node[k] is not None:
+                    found[k] = node[k]
+                    remaining.discard(k)
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return found
+
+def locate_arbitrary_services(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     try:
         s = root["toggles"]["arbitrary"]["services"]
         if isinstance(s, list):
             return s  # type: ignore[return-value]
     except Exception:
         pass
-    arb = find_first_key(root, "arbitrary")
+    arb = hits.get("arbitrary") if hits is not None else find_first_key(root, "arbitrary")
     if isinstance(arb, dict):
         s = arb.get("services")
         if isinstance(s, list):
             return s  # type: ignore[return-value]
     return None
 
-def locate_check_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
+def locate_check_permissions(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     try:
         cp = root["toggles"]["checkPermissions"]
         if isinstance(cp, list):
             return cp  # type: ignore[return-value]
     except Exception:
         pass
-    cp = find_first_key(root, "checkPermissions")
+    cp = hits.get("checkPermissions") if hits is not None else find_first_key(root, "checkPermissions")
     return cp if isinstance(cp, list) else None
 
-def locate_get_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
+def locate_get_permissions(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     try:
         gp = root["toggles"]["getPermissions"]
         if isinstance(gp, list):
             return gp  # type: ignore[return-value]
     except Exception:
         pass
-    gp = find_first_key(root, "getPermissions")
+    gp = hits.get("getPermissions") if hits is not None else find_first_key(root, "getPermissions")
     return gp if isinstance(gp, list) else None
 
+def locate_all(root: Any, locators: List[Callable[..., Optional[List[Dict[str, Any]]]]]) -> List[Optional[List[Dict[str, Any]]]]:
+    """Items for each locator. toggles.* fast paths first; only if one of them misses is
+    the tree walked, once, for all the fallback keys."""
+    # Empty hits = fast path only (the fallback lookup finds nothing)
+    found = [locator(root, {}) for locator in locators]
+    if None in found:
+        hits = find_first_keys(root, _LOCATOR_KEYS)
+        found = [items if items is not None else locator(root, hits) for locator, items in zip(locators, found)]
+    return found
+
 # -----------------------
 # Diff logic (stdlib only)
 # -----------------------
 
+_MISSING = object()  # internal: key/index present on one side only
+
 def dicts_by_key(items: Iterable[dict], key: str) -> Dict[str, dict]:
     out: Dict[str, dict] = {}
     for it in items or []:
@@ -188,38 +304,66 @@ def dicts_by_key(items: Iterable[dict], key: str) -> Dict[str, dict]:
             out[str(it[key])] = it
     return out
 
+def _join_path(prefix: str, node: Any) -> str:
+    """Materialise a path from its (parent, segment, is_index) chain, e.g. key.sub[2].name."""
+    segs = []
+    while node is not None:
+        node, seg, is_index = node
+        segs.append((seg, is_index))
+    out = [prefix]
+    nonempty = bool(prefix)
+    for seg, is_index in reversed(segs):
+        if is_index:
+            out.append(f"[{seg}]")
+            nonempty = True
+        else:
+            seg = str(seg)
+            out.append("." + seg if nonempty else seg)
+            nonempty = nonempty or bool(seg)
+    return "".join(out)
+
 def paths_changed(a: Any, b: Any, prefix: str = "") -> List[Tuple[str, Any, Any]]:
     diffs: List[Tuple[str, Any, Any]] = []
+    # Iterative DFS; children are pushed in reverse so diffs come out in the same order as a recursive walk.
+    # Paths are kept as (parent, segment, is_index) chains and only joined into strings
+    # for emitted diffs, so unchanged subtrees never pay for path assembly.
+    stack: List[Tuple[Any, Any, Any]] = [(a, b, None)]
+    while stack:
+        a, b, node = stack.pop()
+        if a is _MISSING:
+            diffs.append((_join_path(prefix, node), "(missing)", b))
+            continue
+        if b is _MISSING:
+            diffs.append((_join_path(prefix, node), a, "(missing)"))
+            continue
 
-    if type(a) is not type(b):
-        diffs.append((prefix or "(root)", a, b))
-        return diffs
-
-    if isinstance(a, dict):
-        keys = sorted(set(a.keys()) | set(b.keys()), key=lambda x: str(x))
-        for k in keys:
-            p = f"{prefix}.{k}" if prefix else k
-            if k not in a:
-                diffs.append((p, "(missing)", b[k]))
-            elif k not in b:
-                diffs.append((p, a[k], "(missing)"))
-            else:
-                diffs.extend(paths_changed(a[k], b[k], p))
-        return diffs
-
-    if isinstance(a, list):
-        m = min(len(a), len(b))
-        for i in range(m):
-            p = f"{prefix}[{i}]" if prefix else f"[{i}]"
-            diffs.extend(paths_changed(a[i], b[i], p))
-        for i in range(m, len(a)):
-            diffs.append((f"{prefix}[{i}]", a[i], "(missing)"))
-        for i in range(m, len(b)):
-            diffs.append((f"{prefix}[{i}]", "(missing)", b[i]))
-        return diffs
-
-    if a != b:
-        diffs.append((prefix or "(value)", a, b))
+        if type(a) is not type(b):
+            diffs.append((_join_path(prefix, node) or "(root)", a, b))
+            continue
+
+        # Skip identical subtrees with C-level comparisons. == alone would treat 1/true/1.0 as equal,
+        # so containers must also serialise identically.
+        if a is b or (a == b and (not isinstance(a, _COMPOSITE) or json.dumps(a) == json.dumps(b))):
+            continue
+
+        if isinstance(a, dict):
+            keys = sorted(a.keys() | b.keys())  # JSON object keys are always str
+            for k in reversed(keys):
+                stack.append((a.get(k, _MISSING), b.get(k, _MISSING), (node, k, False)))
+            continue
+
+        if isinstance(a, list):
+            m = min(len(a), len(b))
+            for i in range(len(b) - 1, m - 1, -1):
+                stack.append((_MISSING, b[i], (node, i, True)))
+            for i in range(len(a) - 1, m - 1, -1):
+                stack.append((a[i], _MISSING, (node, i, True)))
+            for i in range(m - 1, -1, -1):
+                stack.append((a[i], b[i], (node, i, True)))
+            continue
+
+        if a != b:
+            diffs.append((_join_path(prefix, node) or "(value)", a, b))
     return diffs
 
 # -----------------------
@@ -234,108 +378,98 @@ def build_group_section(
     v2_items: Optional[List[Dict[str, Any]]],
     col_label_1: str,
     col_label_2: str,
-) -> Tuple[str, List[Tuple[str, str, str, str]]]:
-    html_parts: List[str] = ["<div class='section'><h2>" + escape(title) + "</h2>"]
-    details_rows: List[Tuple[str, str, str, str]] = []
+) -> Tuple[str, Dict[str, List[Tuple[str, str, str]]]]:
+    title_esc = escape(title)  # escaped once per group, not once per row
+    html_parts: List[str] = ["<div class='section'><h2>" + title_esc + "</h2>"]
+    details_rows_by_ident: Dict[str, List[Tuple[str, str, str]]] = {}
 
     if v1_items is None and v2_items is None:
         html_parts.append("<p><b>Not found</b> in either file.</p></div>")
-        return "".join(html_parts), details_rows
+        return "".join(html_parts), details_rows_by_ident
 
     v1_map = dicts_by_key(v1_items or [], id_key)
     v2_map = dicts_by_key(v2_items or [], id_key)
 
-    added   = sorted(set(v2_map) - set(v1_map))
-    deleted = sorted(set(v1_map) - set(v2_map))
-    common  = sorted(set(v1_map) & set(v2_map))
+    added   = sorted(v2_map.keys() - v1_map.keys())
+    deleted = sorted(v1_map.keys() - v2_map.keys())
+    common  = v1_map.keys() & v2_map.keys()  # sorted only when emitted
 
-    has_any = bool(added or deleted or any(paths_changed(v1_map[k], v2_map[k]) for k in common))
+    # Diff each common item once; only the ones that actually changed are kept
+    modified = [(ident, diffs) for ident in sorted(common)
+                if (diffs := paths_changed(v1_map[ident], v2_map[ident]))]
+    has_any = bool(added or deleted or modified)
     if not has_any:
         html_parts.append("<p>No Added/Deleted/Modified items.</p></div>")
-        return "".join(html_parts), details_rows
+        return "".join(html_parts), details_rows_by_ident
 
-    html_parts.append("<table><tr><th>Group</th><th>Status</th><th>" + escape(id_key_label) + "</th>"
-                      "<th>" + escape(col_label_1) + "</th><th>" + escape(col_label_2) + "</th></tr>")
+    html_parts.append("<table><tr><th>Group</th><th>Status</th><th>")
+    html_parts.append(escape(id_key_label))
+    html_parts.append("</th><th>")
+    html_parts.append(escape(col_label_1))
+    html_parts.append("</th><th>")
+    html_parts.append(escape(col_label_2))
+    html_parts.append("</th></tr>")
 
     # Added rows
     for ident in added:
         v2 = v2_map[ident]
-        v2_raw = render_json_raw_with_highlights(v2, changed_paths=set(), whole_highlight={"(root)"})  # whole block red on the "added" side
-        html_parts.append(tr("status-added", [escape(title), "Added", "<code>" + escape(ident) + "</code>", "", v2_raw]))
+        v2_raw = render_json_raw_with_highlights(v2, side=1)  # whole block red on the "added" side
+        html_parts.append(tr5("status-added", title_esc, "Added", f"<code>{escape(ident)}</code>", "", v2_raw))
 
     # Deleted rows
     for ident in deleted:
         v1 = v1_map[ident]
-        v1_raw = render_json_raw_with_highlights(v1, changed_paths=set(), whole_highlight={"(root)"})  # whole block red on the "deleted" side
-        html_parts.append(tr("status-deleted", [escape(title), "Deleted", "<code>" + escape(ident) + "</code>", v1_raw, ""]))
+        v1_raw = render_json_raw_with_highlights(v1, side=0)  # whole block red on the "deleted" side
+        html_parts.append(tr5("status-deleted", title_esc, "Deleted", f"<code>{escape(ident)}</code>", v1_raw, ""))
 
     # Modified rows
-    for ident in common:
-        v1 = v1_map[ident]
-        v2 = v2_map[ident]
-        diffs = paths_changed(v1, v2, prefix="")
-        if not diffs:
-            continue
-
-        changed_paths = {p for p, _, _ in diffs}
-
-        # For composite removals/additions (or type changes), wrap the WHOLE block at that path in red
-        missing_in_v2 = {p for p, _, n in diffs if n == "(missing)"}
-        missing_in_v1 = {p for p, o, _ in diffs if o == "(missing)"}
-        type_change_composite = {p for p, o, n in diffs if type(o) is not type(n) and (isinstance(o, (dict, list)) or isinstance(n, (dict, list)))}
-
-        whole_v1 = missing_in_v2 | type_change_composite
-        whole_v2 = missing_in_v1 | type_change_composite
-
-        v1_raw = render_json_raw_with_highlights(v1, changed_paths, whole_highlight=whole_v1)
-        v2_raw = render_json_raw_with_highlights(v2, changed_paths, whole_highlight=whole_v2)
-
-        html_parts.append(tr("status-modified", [escape(title), "Modified", "<code>" + escape(ident) + "</code>", v1_raw, v2_raw]))
-
-        # details rows
-        for path, old, new in diffs:
-            old_text = old if isinstance(old, str) else json.dumps(old, ensure_ascii=False)
-            new_text = new if isinstance(new, str) else json.dumps(new, ensure_ascii=False)
-            old_html = "<span class='value-diff'>" + escape(old_text) + "</span>" if old != "(missing)" else "<span class='missing'>(missing)</span>"
-            new_html = "<span class='value-diff'>" + escape(new_text) + "</span>" if new != "(missing)" else "<span class='missing'>(missing)</span>"
-            details_rows.append((ident, path, old_html, new_html))
+    for ident, diffs in modified:
+        v1_raw, v2_raw, details = render_pair(v1_map[ident], v2_map[ident], diffs)
+        html_parts.append(tr5("status-modified", title_esc, "Modified", f"<code>{escape(ident)}</code>", v1_raw, v2_raw))
+        details_rows_by_ident[ident] = details
 
     html_parts.append("</table></div>")
-    return "".join(html_parts), details_rows
+    return "".join(html_parts), details_rows_by_ident
 
 def build_modified_details_table_grouped(
     title: str,
     id_key_label: str,
-    details: List[Tuple[str, str, str, str]],
+    grouped: Dict[str, List[Tuple[str, str, str]]],
     col_label_1: str,
     col_label_2: str,
 ) -> str:
-    if not details:
+    if not grouped:
         return ""
-    grouped: Dict[str, List[Tuple[str, str, str]]] = defaultdict(list)
-    for ident, path, old_html, new_html in details:
-        grouped[ident].append((path, old_html, new_html))
 
-    parts = [f"<div class='section'><h3>{escape(title)} — Modified details</h3>"]
+    label_esc = escape(id_key_label)
+    thead = ("<table class='subtable'><thead><tr><th>Field path</th>"
+             f"<th class='wrap'>{escape(col_label_1)}</th>"
+             "<th class='arrow-cell'>→</th>"
+             f"<th class='wrap'>{escape(col_label_2)}</th></tr></thead><tbody>")
+    parts = ["<div class='section'><h3>", escape(title), " — Modified details</h3>"]
+    append = parts.append
     for ident in sorted(grouped.keys(), key=lambda s: s.lower()):
         rows = grouped[ident]
-        parts.append("<div class='ident-hdr'><span class='ident-chip'>" + escape(ident) + "</span>"
-                     "<span class='ident-meta'>" + escape(id_key_label) + f" • {len(rows)} change(s)</span></div>")
-        parts.append("<table class='subtable'>")
-        parts.append("<thead><tr><th>Field path</th>"
-                     f"<th class='wrap'>{escape(col_label_1)}</th>"
-                     "<th class='arrow-cell'>→</th>"
-                     f"<th class='wrap'>{escape(col_label_2)}</th></tr></thead><tbody>")
+        append("<div class='ident-hdr'><span class='ident-chip'>")
+        append(escape(ident))
+        append("</span><span class='ident-meta'>")
+        append(label_esc)
+        append(f" • {len(rows)} change(s)</span></div>")
+        append(thead)
         for path, old_html, new_html in rows:
-            parts.append("<tr><td><code>" + escape(path) + "</code></td>"
-                         "<td class='wrap'>" + old_html + "</td>"
-                         "<td class='arrow-cell'>→</td>"
-                         "<td class='wrap'>" + new_html + "</td></tr>")
-        parts.append("</tbody></table>")
-    parts.append("</div>")
+            append("<tr><td><code>")
+            append(escape(path))
+            append("</code></td><td class='wrap'>")
+            append(old_html)
+            append("</td><td class='arrow-cell'>→</td><td class='wrap'>")
+            append(new_html)
+            append("</td></tr>")
+        append("</tbody></table>")
+    append("</div>")
     return "".join(parts)
 
-def build_report(v1_path: Path, v2_path: Path) -> str:
+def build_report(v1_path: Path, v2_path: Path) -> Iterator[str]:
+    # Yields the report in chunks so callers can stream it to disk without one big join
     j1 = load_json(v1_path)
     j2 = load_json(v2_path)
 
@@ -348,11 +482,11 @@ def build_report(v1_path: Path, v2_path: Path) -> str:
         ("getPermissions", "Resource Type", "resourceType", locate_get_permissions),
     ]
 
-    presence = []
-    for title, _, _, locator in groups:
-        v1_items = locator(j1)
-        v2_items = locator(j2)
-        presence.append((title, v1_items is not None, v2_items is not None))
+    locators = [locator for _, _, _, locator in groups]
+    located = list(zip(groups, locate_all(j1, locators), locate_all(j2, locators)))
+
+    presence = [(title, v1_items is not None, v2_items is not None)
+                for (title, _, _, _), v1_items, v2_items in located]
 
     parts: List[str] = [
         "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>",
@@ -362,23 +496,22 @@ def build_report(v1_path: Path, v2_path: Path) -> str:
         "<h1>Toggle JSON Diff Report</h1>",
         "<div class='section'><h2>Summary</h2><ul>",
     ]
+    label1_esc = escape(label1)
+    label2_esc = escape(label2)
     for title, p1, p2 in presence:
-        parts.append("<li><b>" + escape(title) + "</b>: " +
-                     ("present in " + escape(label1) if p1 else "missing in " + escape(label1)) +
-                     " / " +
-                     ("present in " + escape(label2) if p2 else "missing in " + escape(label2)) +
-                     "</li>")
-    parts.append("</ul><div class='small'>Compared files: <code>" + escape(str(v1_path)) + "</code> and <code>" + escape(str(v2_path)) + "</code></div></div>")
-
-    for title, id_label, id_key, locator in groups:
-        v1_items = locator(j1)
-        v2_items = locator(j2)
-        main_html, details_rows = build_group_section(title, id_label, id_key, v1_items, v2_items, label1, label2)
-        parts.append(main_html)
-        parts.append(build_modified_details_table_grouped(title, id_label, details_rows, label1, label2))
-
-    parts.append("</body></html>")
-    return "".join(parts)
+        parts.extend(("<li><b>", escape(title), "</b>: ",
+                      "present in " if p1 else "missing in ", label1_esc, " / ",
+                      "present in " if p2 else "missing in ", label2_esc, "</li>"))
+    parts.extend(("</ul><div class='small'>Compared files: <code>", escape(str(v1_path)),
+                  "</code> and <code>", escape(str(v2_path)), "</code></div></div>"))
+    yield from parts
+
+    for (title, id_label, id_key, _), v1_items, v2_items in located:
+        main_html, details_by_ident = build_group_section(title, id_label, id_key, v1_items, v2_items, label1, label2)
+        yield main_html
+        yield build_modified_details_table_grouped(title, id_label, details_by_ident, label1, label2)
+
+    yield "</body></html>"
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(
@@ -396,8 +529,16 @@ def main() -> None:
         raise SystemExit(f"Not found: {args.v1}")
     if not args.v2.exists():
         raise SystemExit(f"Not found: {args.v2}")
-    html = build_report(args.v1, args.v2)
-    args.output.write_text(html, encoding="utf-8")
+    # Stream into a sibling temp file and swap it in at the end, so invalid input or a
+    # failure mid-render leaves any previous report untouched
+    tmp = args.output.with_name(f".{args.output.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as fp:
+            fp.writelines(build_report(args.v1, args.v2))
+        os.replace(tmp, args.output)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
     print("Report saved to:", args.output.resolve())
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@
 from __future__ import annotations
 import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .report import build_report, build_report_from_objects
@@ -27,6 +28,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--v2-path", type=str, help="File path in repo for V2 JSON")
     p.add_argument("--gh-token", type=str, default=os.getenv("GITHUB_TOKEN"), help="GitHub token (or set env GITHUB_TOKEN)")
     p.add_argument("--gh-base-url", type=str, help="Base URL for GitHub Enterprise (e.g., https://ghe.example.com). If set, API assumed at /api/v3 and raw at host root.")
+    p.add_argument("--cache", action="store_true", help="Keep fetched files in ~/.cache/json-diff-report and revalidate them by ETag")
 
     # Device (SSO) OAuth flow
     p.add_argument("--oauth-device", action="store_true", help="Use OAuth device flow (SSO) to obtain a token for GitHub")
@@ -84,8 +86,12 @@ def main() -> None:
     required = [args.gh_owner, args.gh_repo, args.v1_branch, args.v1_path, args.v2_branch, args.v2_path]
     if all(required):
         try:
-            j1 = fetch_json(args.gh_owner, args.gh_repo, args.v1_branch, args.v1_path, token=args.gh_token, base_api=base_api, base_raw=base_raw)
-            j2 = fetch_json(args.gh_owner, args.gh_repo, args.v2_branch, args.v2_path, token=args.gh_token, base_api=base_api, base_raw=base_raw)
+            # The two fetches are independent network round trips; run them side by side
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                f1 = ex.submit(fetch_json, args.gh_owner, args.gh_repo, args.v1_branch, args.v1_path, token=args.gh_token, base_api=base_api, base_raw=base_raw, use_cache=args.cache)
+                f2 = ex.submit(fetch_json, args.gh_owner, args.gh_repo, args.v2_branch, args.v2_path, token=args.gh_token, base_api=base_api, base_raw=base_raw, use_cache=args.cache)
+                j1 = f1.result()
+                j2 = f2.result()
         except GitHubFetchError as e:
             raise SystemExit(f"GitHub fetch failed: {e}")
         label1 = f"{args.gh_owner}/{args.gh_repo}@{args.v1_branch}:{args.v1_path}"
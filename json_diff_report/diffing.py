@@ -1,50 +1,98 @@
 
 from __future__ import annotations
+import json
+import sys
 from typing import Any, Dict, Iterable, List, Tuple
 
+try:
+    import orjson  # optional: ~10x cheaper serialisation for the identical-subtree check
+except ImportError:
+    orjson = None
+
+_MISSING = object()  # internal: key/index present on one side only
+
+def _same_json(a: Any, b: Any) -> bool:
+    """For a == b: True if they also serialise identically (== alone treats 1/true/1.0 as equal)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(a) == orjson.dumps(b)
+        except TypeError:  # orjson.JSONEncodeError, e.g. ints beyond 64 bits
+            pass
+    return json.dumps(a) == json.dumps(b)
+
 def dicts_by_key(items: Iterable[dict], key: str) -> Dict[str, dict]:
     """Map list of dicts -> {item[key]: item} (skip non-dicts/missing key)."""
-    out: Dict[str, dict] = {}
-    for it in items or []:
-        if isinstance(it, dict) and key in it:
-            out[str(it[key])] = it
-    return out
+    return {
+        (ident if type(ident := it[key]) is str else str(ident)): it
+        for it in items or ()
+        if type(it) is dict and key in it
+    }
+
+def _join_path(prefix: str, node: Any) -> str:
+    """Materialise a path from its (parent, segment, is_index) chain, e.g. key.sub[2].name."""
+    segs = []
+    while node is not None:
+        node, seg, is_index = node
+        segs.append((seg, is_index))
+    out = [prefix]
+    nonempty = bool(prefix)
+    for seg, is_index in reversed(segs):
+        if is_index:
+            out.append(f"[{seg}]")
+            nonempty = True
+        else:
+            seg = str(seg)
+            out.append("." + seg if nonempty else seg)
+            nonempty = nonempty or bool(seg)
+    # Interned: the same relative path recurs for every modified item of a group,
+    # so the diff lists and changed-path sets share one string per distinct path.
+    return sys.intern("".join(out))
 
 def paths_changed(a: Any, b: Any, prefix: str = "") -> List[Tuple[str, Any, Any]]:
     """
-    Recursively compute differences between a and b.
+    Compute differences between a and b (iterative DFS, no recursion limit).
     Returns [(path, old, new)]. Uses '(missing)' sentinel for adds/deletes.
     Paths look like: key.sub[2].name
     """
     diffs: List[Tuple[str, Any, Any]] = []
+    # Iterative DFS; children are pushed in reverse so diffs come out in the same order as a recursive walk.
+    # Paths are kept as (parent, segment, is_index) chains and only joined into strings
+    # for emitted diffs, so unchanged subtrees never pay for path assembly.
+    stack: List[Tuple[Any, Any, Any]] = [(a, b, None)]
+    while stack:
+        a, b, node = stack.pop()
+        if a is _MISSING:
+            diffs.append((_join_path(prefix, node), "(missing)", b))
+            continue
+        if b is _MISSING:
+            diffs.append((_join_path(prefix, node), a, "(missing)"))
+            continue
+
+        if type(a) is not type(b):
+            diffs.append((_join_path(prefix, node) or "(root)", a, b))
+            continue
+
+        # Skip identical subtrees with C-level comparisons. == alone would treat 1/true/1.0 as equal,
+        # so containers must also serialise identically.
+        if a is b or (a == b and (not isinstance(a, (dict, list)) or _same_json(a, b))):
+            continue
+
+        if isinstance(a, dict):
+            keys = sorted(a.keys() | b.keys())  # JSON object keys are always str
+            for k in reversed(keys):
+                stack.append((a.get(k, _MISSING), b.get(k, _MISSING), (node, k, False)))
+            continue
+
+        if isinstance(a, list):
+            m = min(len(a), len(b))
+            for i in range(len(b) - 1, m - 1, -1):
+                stack.append((_MISSING, b[i], (node, i, True)))
+            for i in range(len(a) - 1, m - 1, -1):
+                stack.append((a[i], _MISSING, (node, i, True)))
+            for i in range(m - 1, -1, -1):
+                stack.append((a[i], b[i], (node, i, True)))
+            continue
 
-    if type(a) is not type(b):
-        diffs.append((prefix or "(root)", a, b))
-        return diffs
-
-    if isinstance(a, dict):
-        keys = sorted(set(a.keys()) | set(b.keys()), key=lambda x: str(x))
-        for k in keys:
-            p = f"{prefix}.{k}" if prefix else k
-            if k not in a:
-                diffs.append((p, "(missing)", b[k]))
-            elif k not in b:
-                diffs.append((p, a[k], "(missing)"))
-            else:
-                diffs.extend(paths_changed(a[k], b[k], p))
-        return diffs
-
-    if isinstance(a, list):
-        m = min(len(a), len(b))
-        for i in range(m):
-            p = f"{prefix}[{i}]" if prefix else f"[{i}]"
-            diffs.extend(paths_changed(a[i], b[i], p))
-        for i in range(m, len(a)):
-            diffs.append((f"{prefix}[{i}]", a[i], "(missing)"))
-        for i in range(m, len(b)):
-            diffs.append((f"{prefix}[{i}]", "(missing)", b[i]))
-        return diffs
-
-    if a != b:
-        diffs.append((prefix or "(value)", a, b))
+        if a != b:
+            diffs.append((_join_path(prefix, node) or "(value)", a, b))
     return diffs
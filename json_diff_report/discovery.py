@@ -1,12 +1,35 @@
 
 from __future__ import annotations
 import json
+import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import orjson  # optional: faster parsing, reads bytes directly
+except ImportError:
+    orjson = None
+
+_LONG_DIGITS = re.compile(rb"\d{19}")  # may not fit a 64-bit int; see loads_bytes
+
+# Keys the locate_* helpers fall back to searching for; see find_first_keys
+LOCATOR_KEYS = ("arbitrary", "checkPermissions", "getPermissions")
+
+def loads_bytes(raw: bytes) -> Any:
+    """Parse JSON bytes; orjson when installed, else (or on anything orjson rejects) stdlib with lenient UTF-8."""
+    if orjson is not None:
+        # orjson turns integers outside 64 bits into floats instead of failing, so any
+        # 19+ digit run (possibly one inside a string) goes to the stdlib instead
+        if not _LONG_DIGITS.search(raw):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass  # invalid UTF-8, NaN/Infinity: let the stdlib decide
+    return json.loads(raw.decode("utf-8", errors="replace"))
 
 def load_json(path: Path) -> Any:
     """Load a JSON file with UTF-8 (lenient)."""
-    return json.loads(path.read_text(encoding="utf-8", errors="replace"))
+    return loads_bytes(path.read_bytes())
 
 def find_first_key(root: Any, key: str) -> Optional[Any]:
     """DFS: return the first value for 'key' anywhere in the JSON."""
@@ -24,7 +47,24 @@ def find_first_key(root: Any, key: str) -> Optional[Any]:
                 return found
     return None
 
-def locate_arbitrary_services(root: Any) -> Optional[List[Dict[str, Any]]]:
+def find_first_keys(root: Any, keys: Iterable[str]) -> Dict[str, Any]:
+    """One iterative DFS collecting the first non-None value for each of 'keys' (same order as find_first_key)."""
+    remaining = set(keys)
+    found: Dict[str, Any] = {}
+    stack = [root]
+    while stack and remaining:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for k in node.keys() & remaining:
+                if node[k] is not None:
+                    found[k] = node[k]
+                    remaining.discard(k)
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return found
+
+def locate_arbitrary_services(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """Prefer toggles.arbitrary.services; else any 'arbitrary' with a 'services' list."""
     try:
         s = root["toggles"]["arbitrary"]["services"]
@@ -32,14 +72,14 @@ def locate_arbitrary_services(root: Any) -> Optional[List[Dict[str, Any]]]:
             return s  # type: ignore[return-value]
     except Exception:
         pass
-    arb = find_first_key(root, "arbitrary")
+    arb = hits.get("arbitrary") if hits is not None else find_first_key(root, "arbitrary")
     if isinstance(arb, dict):
         s = arb.get("services")
         if isinstance(s, list):
             return s  # type: ignore[return-value]
     return None
 
-def locate_check_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
+def locate_check_permissions(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """Prefer toggles.checkPermissions; else any 'checkPermissions' list."""
     try:
         cp = root["toggles"]["checkPermissions"]
@@ -47,10 +87,10 @@ def locate_check_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
             return cp  # type: ignore[return-value]
     except Exception:
         pass
-    cp = find_first_key(root, "checkPermissions")
+    cp = hits.get("checkPermissions") if hits is not None else find_first_key(root, "checkPermissions")
     return cp if isinstance(cp, list) else None
 
-def locate_get_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
+def locate_get_permissions(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """Prefer toggles.getPermissions; else any 'getPermissions' list."""
     try:
         gp = root["toggles"]["getPermissions"]
@@ -58,5 +98,5 @@ def locate_get_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
             return gp  # type: ignore[return-value]
     except Exception:
         pass
-    gp = find_first_key(root, "getPermissions")
+    gp = hits.get("getPermissions") if hits is not None else find_first_key(root, "getPermissions")
     return gp if isinstance(gp, list) else None
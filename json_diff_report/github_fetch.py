@@ -1,26 +1,79 @@
 
 from __future__ import annotations
 import base64
+import hashlib
 import json
-from typing import Optional
+import os
+import tempfile
+from email.message import Message
+from pathlib import Path
+from typing import Optional, Tuple
 from urllib import request, error, parse
 
 DEFAULT_UA = "json-diff-report/1.1"
+CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "json-diff-report"
 
 class GitHubFetchError(RuntimeError):
     pass
 
 def _http_get(url: str, headers: dict, timeout: int = 30) -> bytes:
+    return _http_request(url, headers, timeout=timeout)[1]
+
+def _http_request(url: str, headers: dict, timeout: int = 30) -> Tuple[int, bytes, Message]:
+    """GET via urllib (redirects, proxies). Returns (status, body, headers);
+    304 comes back as a status, other 4xx/5xx raise."""
     req = request.Request(url, headers=headers, method="GET")
     try:
         with request.urlopen(req, timeout=timeout) as resp:
-            return resp.read()
+            return resp.status, resp.read(), resp.headers
     except error.HTTPError as e:
+        if e.code == 304:
+            return 304, b"", e.headers
         body = e.read().decode("utf-8", errors="replace") if hasattr(e, "read") else ""
         raise GitHubFetchError(f"HTTPError {e.code} for {url}: {body}") from e
     except error.URLError as e:
         raise GitHubFetchError(f"URLError for {url}: {e}") from e
 
+def _cache_file(url: str) -> Path:
+    return CACHE_DIR / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+def _cache_load(url: str) -> Optional[Tuple[str, str]]:
+    """(etag, text) from a previous fetch of url, or None."""
+    try:
+        etag, _, body = _cache_file(url).read_bytes().partition(b"\n")
+    except OSError:
+        return None
+    return etag.decode("utf-8"), body.decode("utf-8")
+
+def _cache_store(url: str, etag: Optional[str], text: str) -> None:
+    """Keep etag and body in one private file (0600 in a 0700 dir), replaced atomically."""
+    if not etag or "\n" in etag:
+        return
+    target = _cache_file(url)
+    try:
+        CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=".tmp-")  # mkstemp creates the file 0600
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(etag.encode("utf-8") + b"\n" + text.encode("utf-8"))  # bytes: keep CRLF as-is
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass  # caching is best effort
+
+def _cached_get(url: str, headers: dict, timeout: int, use_cache: bool) -> Tuple[Optional[str], bytes, Message]:
+    """GET with If-None-Match from the on-disk cache. Returns (cached_text, body, headers);
+    cached_text is set only when the server answered 304 Not Modified."""
+    cached = _cache_load(url) if use_cache else None
+    if cached:
+        headers = dict(headers, **{"If-None-Match": cached[0]})
+    status, data, resp_headers = _http_request(url, headers, timeout=timeout)
+    if status == 304 and cached:
+        return cached[1], data, resp_headers
+    return None, data, resp_headers
+
 def fetch_text(
     owner: str,
     repo: str,
@@ -30,6 +83,7 @@ def fetch_text(
     timeout: int = 30,
     base_api: Optional[str] = None,
     base_raw: Optional[str] = None,
+    use_cache: bool = False,
 ) -> str:
     """Fetch file content as text from GitHub.com or GitHub Enterprise.
     - If token is provided, prefer the Contents API (works for public/private).
@@ -37,6 +91,10 @@ def fetch_text(
     - If no token and base_api is None, fall back to raw host (public only).
       * Dotcom default raw host: https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{path}
       * GHES typical raw path:   {base_raw}/{owner}/{repo}/raw/{branch}/{path}
+    With use_cache (off by default), the last body and ETag per URL are kept under
+    CACHE_DIR and a 304 Not Modified answer returns the cached body without
+    downloading it again. Cached bodies may be private-repo contents; the files
+    are readable by the current user only.
     """
     # Defaults
     api = base_api or "https://api.github.com"
@@ -47,29 +105,58 @@ def fetch_text(
         api_url = f"{api}/repos/{owner}/{repo}/contents/{parse.quote(path)}?ref={parse.quote(branch)}"
         headers = {
             "User-Agent": DEFAULT_UA,
-            "Accept": "application/vnd.github+json",
+            # Ask for the file body itself; servers that ignore this send the JSON envelope instead
+            "Accept": "application/vnd.github.raw+json",
         }
         if token:
             headers["Authorization"] = f"Bearer {token}"
-        data = _http_get(api_url, headers, timeout=timeout)
-        obj = json.loads(data.decode("utf-8", errors="replace"))
-        if isinstance(obj, dict) and obj.get("encoding") == "base64" and "content" in obj:
-            raw = base64.b64decode(obj["content"])
-            return raw.decode("utf-8", errors="replace")
-        if isinstance(obj, dict) and "download_url" in obj and obj["download_url"]:
-            dl_headers = {"User-Agent": DEFAULT_UA}
-            if token:
-                dl_headers["Authorization"] = f"Bearer {token}"
-            data2 = _http_get(obj["download_url"], dl_headers, timeout=timeout)
-            return data2.decode("utf-8", errors="replace")
-        raise GitHubFetchError("Unexpected API response; missing base64 content or download_url.")
+        cached_text, data, resp_headers = _cached_get(api_url, headers, timeout, use_cache)
+        if cached_text is not None:
+            return cached_text
+        text = _contents_text(data, resp_headers, token, timeout)
+        if use_cache:
+            _cache_store(api_url, resp_headers.get("ETag"), text)
+        return text
     # Raw fallback (public only)
     if base_raw:
         raw_url = f"{raw_host}/{owner}/{repo}/raw/{branch}/{path}"
     else:
         raw_url = f"{raw_host}/{owner}/{repo}/{branch}/{path}"
-    data = _http_get(raw_url, {"User-Agent": DEFAULT_UA}, timeout=timeout)
-    return data.decode("utf-8", errors="replace")
+    cached_text, data, resp_headers = _cached_get(raw_url, {"User-Agent": DEFAULT_UA}, timeout, use_cache)
+    if cached_text is not None:
+        return cached_text
+    text = data.decode("utf-8", errors="replace")
+    if use_cache:
+        _cache_store(raw_url, resp_headers.get("ETag"), text)
+    return text
+
+def _is_envelope(resp_headers: Message) -> bool:
+    """True when the Contents API sent its JSON envelope (application/json or a
+    vnd.github+json type) rather than the application/vnd.github.raw body."""
+    ctype = resp_headers.get_content_type()
+    if ctype.startswith("application/vnd.github.raw"):
+        return False
+    return ctype == "application/json" or (ctype.startswith("application/vnd.github") and ctype.endswith("json"))
+
+def _contents_text(data: bytes, resp_headers: Message, token: Optional[str], timeout: int) -> str:
+    """File text from a Contents API response: the raw body, or the JSON envelope when the raw media type was ignored.
+    Decided from the response Content-Type, so a raw .json file that looks like an envelope is left alone."""
+    text = data.decode("utf-8", errors="replace")
+    if not _is_envelope(resp_headers):
+        return text
+    obj = json.loads(text)
+    if not isinstance(obj, dict):  # e.g. a directory listing
+        raise GitHubFetchError("Unexpected API response; missing base64 content or download_url.")
+    if obj.get("encoding") == "base64" and "content" in obj:
+        raw = base64.b64decode(obj["content"])
+        return raw.decode("utf-8", errors="replace")
+    if obj.get("download_url"):
+        dl_headers = {"User-Agent": DEFAULT_UA}
+        if token:
+            dl_headers["Authorization"] = f"Bearer {token}"
+        data2 = _http_get(obj["download_url"], dl_headers, timeout=timeout)
+        return data2.decode("utf-8", errors="replace")
+    raise GitHubFetchError("Unexpected API response; missing base64 content or download_url.")
 
 def fetch_json(
     owner: str,
@@ -80,6 +167,7 @@ def fetch_json(
     timeout: int = 30,
     base_api: Optional[str] = None,
     base_raw: Optional[str] = None,
+    use_cache: bool = False,
 ):
-    text = fetch_text(owner, repo, branch, path, token=token, timeout=timeout, base_api=base_api, base_raw=base_raw)
+    text = fetch_text(owner, repo, branch, path, token=token, timeout=timeout, base_api=base_api, base_raw=base_raw, use_cache=use_cache)
     return json.loads(text)
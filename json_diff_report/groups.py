@@ -10,7 +10,7 @@ class GroupSpec:
     title: str
     id_key_label: str
     id_key: str
-    locator: Callable[[Any], Optional[List[Dict[str, Any]]]]
+    locator: Callable[..., Optional[List[Dict[str, Any]]]]  # (root, hits=None) -> items
 
 GROUPS: List[GroupSpec] = [
     GroupSpec(title="arbitrary → services", id_key_label="Service Name", id_key="name",         locator=locate_arbitrary_services),
@@ -1,8 +1,11 @@
 
 from __future__ import annotations
 import json
+from functools import lru_cache
 from html import escape
-from typing import Any, List, Set, Tuple
+from typing import AbstractSet, Any, List, Tuple
+
+_escape = lru_cache(maxsize=8192)(escape)  # keys, identifiers and paths repeat heavily across rows
 
 CSS = """
 <style>
@@ -37,61 +40,113 @@ CSS = """
 </style>
 """
 
+# JSON text for scalars without going through the encoder; none of it needs HTML escaping
+_JSON_PRIMS = {
+    bool: lambda v: "true" if v else "false",
+    type(None): lambda v: "null",
+    int: str,
+    float: json.dumps,  # keeps the NaN/Infinity spelling
+}
+
 def render_value(v: Any, is_changed: bool) -> str:
     if v == "(missing)":
         return "<span class='missing'>(missing)</span>"
-    try:
-        txt = json.dumps(v, ensure_ascii=False, indent=2)
-    except Exception:
-        txt = str(v)
-    return f"<span class='value-diff'>{escape(txt)}</span>" if is_changed else escape(txt)
+    prim = _JSON_PRIMS.get(type(v))
+    if prim is not None:
+        txt = prim(v)
+    else:
+        try:
+            txt = escape(json.dumps(v, ensure_ascii=False, indent=2))
+        except Exception:
+            txt = escape(str(v))
+    return f"<span class='value-diff'>{txt}</span>" if is_changed else txt
 
-def render_with_path_highlights(obj: Any, changed_paths: Set[str], base_path: str = "") -> str:
+def render_with_path_highlights(obj: Any, changed_paths: AbstractSet[str], base_path: str = "") -> str:
     """Render dicts as key/value grids; lists/primitives as <pre>. Highlight ONLY exact changed paths."""
-    if not isinstance(obj, dict):
-        return "<pre class='valuecell'>" + render_value(obj, base_path in changed_paths) + "</pre>"
+    out: List[str] = []
+    if changed_paths:
+        _render_into(obj, changed_paths, base_path, out)
+    else:
+        _render_plain_into(obj, out)  # Added/Deleted blocks: nothing to highlight
+    return "".join(out)
 
-    rows = []
-    for k in sorted(obj.keys(), key=lambda x: str(x)):
+def _render_into(obj: Any, changed_paths: AbstractSet[str], base_path: str, out: List[str]) -> None:
+    """render_with_path_highlights, appending fragments to `out` instead of building nested strings."""
+    if type(obj) is not dict:
+        out.append("<pre class='valuecell'>")
+        out.append(render_value(obj, base_path in changed_paths))
+        out.append("</pre>")
+        return
+
+    out.append("<div class='kv'>")
+    for k in sorted(obj):
         path_k = f"{base_path}.{k}" if base_path else k
         v = obj[k]
-        if isinstance(v, dict):
-            sub_html = render_with_path_highlights(v, changed_paths, path_k)
-            rows.append(
-                "<div class='keycell'><code>" + escape(str(k)) + "</code></div>"
-                "<div class='valuecell'>" + sub_html + "</div>"
-            )
-        elif isinstance(v, list):
-            parts = []
+        t = type(v)  # exact JSON types; one C slot read instead of an isinstance chain
+        out.append("<div class='keycell'><code>")
+        out.append(_escape(str(k)))
+        if t is dict:
+            out.append("</code></div><div class='valuecell'>")
+            _render_into(v, changed_paths, path_k, out)
+            out.append("</div>")
+        elif t is list:
+            out.append("</code></div><div class='valuecell'>")
             for i, item in enumerate(v):
                 ipath = f"{path_k}[{i}]"
-                if isinstance(item, dict):
-                    parts.append(render_with_path_highlights(item, changed_paths, ipath))
+                if type(item) is dict:
+                    _render_into(item, changed_paths, ipath, out)
                 else:
-                    parts.append("<pre class='valuecell'>" + render_value(item, ipath in changed_paths) + "</pre>")
-            rows.append(
-                "<div class='keycell'><code>" + escape(str(k)) + "</code></div>"
-                "<div class='valuecell'>" + "".join(parts) + "</div>"
-            )
+                    out.append("<pre class='valuecell'>")
+                    out.append(render_value(item, ipath in changed_paths))
+                    out.append("</pre>")
+            out.append("</div>")
         else:
-            rows.append(
-                "<div class='keycell'><code>" + escape(str(k)) + "</code></div>"
-                "<div class='valuecell'><pre>" + render_value(v, path_k in changed_paths) + "</pre></div>"
-            )
-    return "<div class='kv'>" + "".join(rows) + "</div>"
+            out.append("</code></div><div class='valuecell'><pre>")
+            out.append(render_value(v, path_k in changed_paths))
+            out.append("</pre></div>")
+    out.append("</div>")
+
+def _render_plain_into(obj: Any, out: List[str]) -> None:
+    """_render_into without highlights: no path strings built, no membership tests."""
+    if type(obj) is not dict:
+        out.append("<pre class='valuecell'>")
+        out.append(render_value(obj, False))
+        out.append("</pre>")
+        return
 
-def tr(row_class: str, cells: List[str]) -> str:
-    tds = "".join("<td>" + c + "</td>" for c in cells)
-    cls = " class='" + row_class + "'" if row_class else ""
-    return "<tr" + cls + ">" + tds + "</tr>"
+    out.append("<div class='kv'>")
+    for k in sorted(obj):
+        v = obj[k]
+        t = type(v)
+        out.append("<div class='keycell'><code>")
+        out.append(_escape(str(k)))
+        if t is dict:
+            out.append("</code></div><div class='valuecell'>")
+            _render_plain_into(v, out)
+            out.append("</div>")
+        elif t is list:
+            out.append("</code></div><div class='valuecell'>")
+            for item in v:
+                if type(item) is dict:
+                    _render_plain_into(item, out)
+                else:
+                    out.append("<pre class='valuecell'>")
+                    out.append(render_value(item, False))
+                    out.append("</pre>")
+            out.append("</div>")
+        else:
+            out.append("</code></div><div class='valuecell'><pre>")
+            out.append(render_value(v, False))
+            out.append("</pre></div>")
+    out.append("</div>")
 
 def build_modified_details_table(title: str, id_key_label: str, details: List[Tuple[str, str, str, str]]) -> str:
     if not details:
         return ""
-    parts = ["<div class='section'><h3>" + escape(title) + " — Modified details</h3>"]
+    parts = ["<div class='section'><h3>" + _escape(title) + " — Modified details</h3>"]
     parts.append("<table class='subtable'>")
-    parts.append("<tr><th>" + escape(id_key_label) + "</th><th>Field path</th><th>Old</th><th>New</th></tr>")
+    parts.append("<tr><th>" + _escape(id_key_label) + "</th><th>Field path</th><th>Old</th><th>New</th></tr>")
     for ident, path, old_html, new_html in details:
-        parts.append("<tr><td><code>" + escape(ident) + "</code></td><td><code>" + escape(path) + "</code></td><td>" + old_html + "</td><td>" + new_html + "</td></tr>")
+        parts.append("<tr><td><code>" + _escape(ident) + "</code></td><td><code>" + _escape(path) + "</code></td><td>" + old_html + "</td><td>" + new_html + "</td></tr>")
     parts.append("</table></div>")
     return "".join(parts)
@@ -20,14 +20,28 @@ Usage:
 from __future__ import annotations
 import argparse
 import json
+import os
+import re
+import sys
+from functools import lru_cache
+from operator import itemgetter
 from html import escape
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Set
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Optional, Tuple, TextIO
+
+try:
+    import orjson  # optional: faster parsing, reads bytes directly
+except ImportError:
+    orjson = None
+
+_LONG_DIGITS = re.compile(rb"\d{19}")  # may not fit a 64-bit int; see load_json
 
 # -----------------------
 # HTML / CSS rendering
 # -----------------------
 
+_escape = lru_cache(maxsize=8192)(escape)  # keys, identifiers and paths repeat heavily across rows
+
 CSS = """
 <style>
   body { font-family: system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif; margin:24px; line-height:1.5; }
@@ -61,62 +75,119 @@ CSS = """
 </style>
 """
 
+# JSON text for scalars without going through the encoder; none of it needs HTML escaping
+_JSON_PRIMS = {
+    bool: lambda v: "true" if v else "false",
+    type(None): lambda v: "null",
+    int: str,
+    float: json.dumps,  # keeps the NaN/Infinity spelling
+}
+
 def render_value(v: Any, is_changed: bool) -> str:
     if v == "(missing)":
         return "<span class='missing'>(missing)</span>"
-    try:
-        txt = json.dumps(v, ensure_ascii=False, indent=2)
-    except Exception:
-        txt = str(v)
-    return f"<span class='value-diff'>{escape(txt)}</span>" if is_changed else escape(txt)
-
-def render_with_path_highlights(obj: Any, changed_paths: Set[str], base_path: str = "") -> str:
+    prim = _JSON_PRIMS.get(type(v))
+    if prim is not None:
+        txt = prim(v)
+    else:
+        try:
+            txt = escape(json.dumps(v, ensure_ascii=False, indent=2))
+        except Exception:
+            txt = escape(str(v))
+    return f"<span class='value-diff'>{txt}</span>" if is_changed else txt
+
+def render_with_path_highlights(obj: Any, changed_paths: AbstractSet[str], base_path: str = "") -> str:
     """Render dicts as key/value grids; lists/primitives as <pre>. Highlight ONLY exact changed paths."""
-    if not isinstance(obj, dict):
-        return "<pre class='valuecell'>" + render_value(obj, base_path in changed_paths) + "</pre>"
-
-    rows = []
-    for k in sorted(obj.keys(), key=lambda x: str(x)):
+    out: List[str] = []
+    if changed_paths:
+        _render_into(obj, changed_paths, base_path, out)
+    else:
+        _render_plain_into(obj, out)  # Added/Deleted blocks: nothing to highlight
+    return "".join(out)
+
+def _render_into(obj: Any, changed_paths: AbstractSet[str], base_path: str, out: List[str]) -> None:
+    """render_with_path_highlights, appending fragments to `out` instead of building nested strings."""
+    if type(obj) is not dict:
+        out.append("<pre class='valuecell'>")
+        out.append(render_value(obj, base_path in changed_paths))
+        out.append("</pre>")
+        return
+
+    out.append("<div class='kv'>")
+    for k in sorted(obj):
         path_k = f"{base_path}.{k}" if base_path else k
         v = obj[k]
-        if isinstance(v, dict):
-            sub_html = render_with_path_highlights(v, changed_paths, path_k)
-            rows.append(
-                "<div class='keycell'><code>" + escape(str(k)) + "</code></div>"
-                "<div class='valuecell'>" + sub_html + "</div>"
-            )
-        elif isinstance(v, list):
-            parts = []
+        t = type(v)  # exact JSON types; one C slot read instead of an isinstance chain
+        out.append("<div class='keycell'><code>")
+        out.append(_escape(str(k)))
+        if t is dict:
+            out.append("</code></div><div class='valuecell'>")
+            _render_into(v, changed_paths, path_k, out)
+            out.append("</div>")
+        elif t is list:
+            out.append("</code></div><div class='valuecell'>")
             for i, item in enumerate(v):
                 ipath = f"{path_k}[{i}]"
-                if isinstance(item, dict):
-                    parts.append(render_with_path_highlights(item, changed_paths, ipath))
+                if type(item) is dict:
+                    _render_into(item, changed_paths, ipath, out)
                 else:
-                    parts.append("<pre class='valuecell'>" + render_value(item, ipath in changed_paths) + "</pre>")
-            rows.append(
-                "<div class='keycell'><code>" + escape(str(k)) + "</code></div>"
-                "<div class='valuecell'>" + "".join(parts) + "</div>"
-            )
+                    out.append("<pre class='valuecell'>")
+                    out.append(render_value(item, ipath in changed_paths))
+                    out.append("</pre>")
+            out.append("</div>")
         else:
-            rows.append(
-                "<div class='keycell'><code>" + escape(str(k)) + "</code></div>"
-                "<div class='valuecell'><pre>" + render_value(v, path_k in changed_paths) + "</pre></div>"
-            )
-    return "<div class='kv'>" + "".join(rows) + "</div>"
+            out.append("</code></div><div class='valuecell'><pre>")
+            out.append(render_value(v, path_k in changed_paths))
+            out.append("</pre></div>")
+    out.append("</div>")
+
+def _render_plain_into(obj: Any, out: List[str]) -> None:
+    """_render_into without highlights: no path strings built, no membership tests."""
+    if type(obj) is not dict:
+        out.append("<pre class='valuecell'>")
+        out.append(render_value(obj, False))
+        out.append("</pre>")
+        return
+
+    out.append("<div class='kv'>")
+    for k in sorted(obj):
+        v = obj[k]
+        t = type(v)
+        out.append("<div class='keycell'><code>")
+        out.append(_escape(str(k)))
+        if t is dict:
+            out.append("</code></div><div class='valuecell'>")
+            _render_plain_into(v, out)
+            out.append("</div>")
+        elif t is list:
+            out.append("</code></div><div class='valuecell'>")
+            for item in v:
+                if type(item) is dict:
+                    _render_plain_into(item, out)
+                else:
+                    out.append("<pre class='valuecell'>")
+                    out.append(render_value(item, False))
+                    out.append("</pre>")
+            out.append("</div>")
+        else:
+            out.append("</code></div><div class='valuecell'><pre>")
+            out.append(render_value(v, False))
+            out.append("</pre></div>")
+    out.append("</div>")
 
-def tr(row_class: str, cells: List[str]) -> str:
-    tds = "".join("<td>" + c + "</td>" for c in cells)
-    cls = " class='" + row_class + "'" if row_class else ""
-    return "<tr" + cls + ">" + tds + "</tr>"
+# Group table rows: only the title, identifier and rendered blocks vary
+_ROW_ADDED = "<tr class='status-added'><td>{title}</td><td>Added</td><td><code>{ident}</code></td><td></td><td><div class='block'>{body}</div></td></tr>"
+_ROW_DELETED = "<tr class='status-deleted'><td>{title}</td><td>Deleted</td><td><code>{ident}</code></td><td><div class='block'>{body}</div></td><td></td></tr>"
+_ROW_MODIFIED = "<tr class='status-modified'><td>{title}</td><td>Modified</td><td><code>{ident}</code></td><td><div class='block'>{v1}</div></td><td><div class='block'>{v2}</div></td></tr>"
 
 def build_modified_details_table(title: str, id_key_label: str, details: List[Tuple[str, str, str, str]]) -> str:
     if not details:
         return ""
-    parts = ["<div class='section'><h3>" + escape(title) + " — Modified details</h3>"]
+    parts = ["<div class='section'><h3>" + _escape(title) + " — Modified details</h3>"]
     parts.append("<table class='subtable'>")
-    parts.append("<tr><th>" + escape(id_key_label) + "</th><th>Field path</th><th>Old</th><th>New</th></tr>")
+    parts.append("<tr><th>" + _escape(id_key_label) + "</th><th>Field path</th><th>Old</th><th>New</th></tr>")
     for ident, path, old_html, new_html in details:
-        parts.append("<tr><td><code>" + escape(ident) + "</code></td><td><code>" + escape(path) + "</code></td><td>" + old_html + "</td><td>" + new_html + "</td></tr>")
+        parts.append("<tr><td><code>" + _escape(ident) + "</code></td><td><code>" + _escape(path) + "</code></td><td>" + old_html + "</td><td>" + new_html + "</td></tr>")
     parts.append("</table></div>")
     return "".join(parts)
 
@@ -125,25 +196,40 @@ def build_modified_details_table(title: str, id_key_label: str, details: List[Tu
 # -----------------------
 
 def load_json(path: Path) -> Any:
-    return json.loads(path.read_text(encoding="utf-8", errors="replace"))
+    raw = path.read_bytes()
+    if orjson is not None:
+        # orjson turns integers outside 64 bits into floats instead of failing, so any
+        # 19+ digit run (possibly one inside a string) goes to the stdlib instead
+        if not _LONG_DIGITS.search(raw):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass  # invalid UTF-8, NaN/Infinity: let the stdlib decide
+    return json.loads(raw.decode("utf-8", errors="replace"))
 
 def find_first_key(root: Any, key: str) -> Optional[Any]:
-    """DFS: return the first value for 'key' anywhere in the JSON."""
-    if isinstance(root, dict):
-        if key in root:
-            return root[key]
-        for v in root.values():
-            found = find_first_key(v, key)
-            if found is not None:
-                return found
-    elif isinstance(root, list):
-        for item in root:
-            found = find_first_key(item, key)
-            if found is not None:
-                return found
-    return None
-
-def locate_arbitrary_services(root: Any) -> Optional[List[Dict[str, Any]]]:
+    """Iterative DFS: return the first non-None value for 'key' anywhere in the JSON."""
+    return find_first_keys(root, (key,)).get(key)
+
+def find_first_keys(root: Any, keys: Iterable[str]) -> Dict[str, Any]:
+    """One walk collecting the first non-None value for each of 'keys', in document (pre-)order."""
+    remaining = set(keys)
+    found: Dict[str, Any] = {}
+    stack = [root]
+    while stack and remaining:
+        node = stack.pop()
+        t = type(node)
+        if t is dict:
+            for k in node.keys() & remaining:
+                if node[k] is not None:
+                    found[k] = node[k]
+                    remaining.discard(k)
+            stack.extend(reversed(list(node.values())))
+        elif t is list:
+            stack.extend(reversed(node))
+    return found
+
+def locate_arbitrary_services(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """Prefer toggles.arbitrary.services; else any 'arbitrary' with a 'services' list."""
     try:
         s = root["toggles"]["arbitrary"]["services"]
@@ -151,14 +237,14 @@ def locate_arbitrary_services(root: Any) -> Optional[List[Dict[str, Any]]]:
             return s  # type: ignore[return-value]
     except Exception:
         pass
-    arb = find_first_key(root, "arbitrary")
+    arb = hits.get("arbitrary") if hits is not None else find_first_key(root, "arbitrary")
     if isinstance(arb, dict):
         s = arb.get("services")
         if isinstance(s, list):
             return s  # type: ignore[return-value]
     return None
 
-def locate_check_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
+def locate_check_permissions(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """Prefer toggles.checkPermissions; else any 'checkPermissions' list."""
     try:
         cp = root["toggles"]["checkPermissions"]
@@ -166,10 +252,10 @@ def locate_check_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
             return cp  # type: ignore[return-value]
     except Exception:
         pass
-    cp = find_first_key(root, "checkPermissions")
+    cp = hits.get("checkPermissions") if hits is not None else find_first_key(root, "checkPermissions")
     return cp if isinstance(cp, list) else None
 
-def locate_get_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
+def locate_get_permissions(root: Any, hits: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """Prefer toggles.getPermissions; else any 'getPermissions' list."""
     try:
         gp = root["toggles"]["getPermissions"]
@@ -177,57 +263,82 @@ def locate_get_permissions(root: Any) -> Optional[List[Dict[str, Any]]]:
             return gp  # type: ignore[return-value]
     except Exception:
         pass
-    gp = find_first_key(root, "getPermissions")
+    gp = hits.get("getPermissions") if hits is not None else find_first_key(root, "getPermissions")
     return gp if isinstance(gp, list) else None
 
+# (result slot, fallback key, locator)
+_LOCATORS = (
+    ("arbitrary_services", "arbitrary", locate_arbitrary_services),
+    ("checkPermissions", "checkPermissions", locate_check_permissions),
+    ("getPermissions", "getPermissions", locate_get_permissions),
+)
+
+def locate_all(root: Any) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+    """Items for all three groups. toggles.* fast paths first; whatever they miss is
+    found with one walk of the tree instead of one walk per locator."""
+    # Empty hits = fast path only (the fallback lookup finds nothing)
+    found = {slot: locator(root, {}) for slot, _, locator in _LOCATORS}
+    missing = [key for slot, key, _ in _LOCATORS if found[slot] is None]
+    if missing:
+        hits = find_first_keys(root, missing)
+        for slot, _, locator in _LOCATORS:
+            if found[slot] is None:
+                found[slot] = locator(root, hits)
+    return found
+
 # -----------------------
 # Diff logic (no deps)
 # -----------------------
 
 def dicts_by_key(items: Iterable[dict], key: str) -> Dict[str, dict]:
-    out: Dict[str, dict] = {}
-    for it in items or []:
-        if isinstance(it, dict) and key in it:
-            out[str(it[key])] = it
-    return out
+    return {
+        (ident if type(ident := it[key]) is str else str(ident)): it
+        for it in items or ()
+        if type(it) is dict and key in it
+    }
+
+_MISSING = object()  # internal: key/index present on one side only
 
 def paths_changed(a: Any, b: Any, prefix: str = "") -> List[Tuple[str, Any, Any]]:
     """
-    Recursively compute differences between a and b.
+    Compute differences between a and b (iterative, no recursion limit).
     Returns [(path, old, new)]. Uses '(missing)' sentinel for adds/deletes.
     Paths look like: key.sub[2].name
     """
     diffs: List[Tuple[str, Any, Any]] = []
-
-    if type(a) is not type(b):
-        diffs.append((prefix or "(root)", a, b))
-        return diffs
-
-    if isinstance(a, dict):
-        keys = sorted(set(a.keys()) | set(b.keys()), key=lambda x: str(x))
-        for k in keys:
-            p = f"{prefix}.{k}" if prefix else k
-            if k not in a:
-                diffs.append((p, "(missing)", b[k]))
-            elif k not in b:
-                diffs.append((p, a[k], "(missing)"))
-            else:
-                diffs.extend(paths_changed(a[k], b[k], p))
-        return diffs
-
-    if isinstance(a, list):
-        m = min(len(a), len(b))
-        for i in range(m):
-            p = f"{prefix}[{i}]" if prefix else f"[{i}]"
-            diffs.extend(paths_changed(a[i], b[i], p))
-        for i in range(m, len(a)):
-            diffs.append((f"{prefix}[{i}]", a[i], "(missing)"))
-        for i in range(m, len(b)):
-            diffs.append((f"{prefix}[{i}]", "(missing)", b[i]))
-        return diffs
-
-    if a != b:
-        diffs.append((prefix or "(value)", a, b))
+    # Children are pushed in reverse so diffs come out in the same order as a recursive walk
+    stack: List[Tuple[Any, Any, str]] = [(a, b, prefix)]
+    while stack:
+        a, b, prefix = stack.pop()
+        if a is _MISSING:
+            diffs.append((sys.intern(prefix), "(missing)", b))
+            continue
+        if b is _MISSING:
+            diffs.append((sys.intern(prefix), a, "(missing)"))
+            continue
+
+        t = type(a)
+        if t is not type(b):
+            diffs.append((sys.intern(prefix) or "(root)", a, b))
+        elif a is b or (a == b and ((t is not dict and t is not list) or json.dumps(a) == json.dumps(b))):
+            # Identical subtree, settled by C-level comparison. == alone treats 1/true/1.0 as equal
+            # inside containers, so those must also serialise identically.
+            pass
+        elif t is dict:
+            keys = sorted(a.keys() | b.keys())  # JSON object keys are always str
+            for k in reversed(keys):
+                p = prefix + "." + str(k) if prefix else k
+                stack.append((a.get(k, _MISSING), b.get(k, _MISSING), p))
+        elif t is list:
+            m = min(len(a), len(b))
+            for i in range(len(b) - 1, m - 1, -1):
+                stack.append((_MISSING, b[i], f"{prefix}[{i}]"))
+            for i in range(len(a) - 1, m - 1, -1):
+                stack.append((a[i], _MISSING, f"{prefix}[{i}]"))
+            for i in range(m - 1, -1, -1):
+                stack.append((a[i], b[i], f"{prefix}[{i}]"))
+        elif a != b:
+            diffs.append((sys.intern(prefix) or "(value)", a, b))
     return diffs
 
 # -----------------------
@@ -240,60 +351,66 @@ class GroupSpec(Tuple[str, str, str, Any]):
     Just a light tuple-like container for simplicity in this single-file script.
     """
 
+def _detail_html(v: Any) -> str:
+    if v == "(missing)":
+        return "<span class='missing'>(missing)</span>"
+    prim = _JSON_PRIMS.get(type(v))
+    if prim is not None:
+        text = prim(v)
+    else:
+        text = escape(v if isinstance(v, str) else json.dumps(v, ensure_ascii=False))
+    return "<span class='value-diff'>" + text + "</span>"
+
+_detail_html_cached = lru_cache(maxsize=4096, typed=True)(_detail_html)  # typed: keep True/1 apart
+_CACHEABLE_TYPES = frozenset((str, int, bool, type(None)))  # not float: -0.0 == 0.0
+
+def _detail_cell(v: Any) -> str:
+    """Details-table cell for an old/new value; repeated scalars (flags, enums, names) are cached."""
+    return _detail_html_cached(v) if type(v) in _CACHEABLE_TYPES else _detail_html(v)
+
+_diff_path = itemgetter(0)  # (path, old, new) -> path
+_EMPTY_PATHS: frozenset = frozenset()  # Added/Deleted blocks: nothing highlighted
+
 def build_group_section(
     title: str,
     id_key_label: str,
     id_key: str,
     v1_items: Optional[List[Dict[str, Any]]],
     v2_items: Optional[List[Dict[str, Any]]],
-) -> Tuple[str, List[Tuple[str, str, str, str]]]:
-    html_parts: List[str] = ["<div class='section'><h2>" + escape(title) + "</h2>"]
+    write: Callable[[str], Any],
+) -> List[Tuple[str, str, str, str]]:
+    """Write the group's section through `write`, one row at a time; return its details rows."""
+    title_esc = _escape(title)  # once per group, not once per row
+    write("<div class='section'><h2>" + title_esc + "</h2>")
     details_rows: List[Tuple[str, str, str, str]] = []
 
     if v1_items is None and v2_items is None:
-        html_parts.append("<p><b>Not found</b> in either file.</p></div>")
-        return "".join(html_parts), details_rows
+        write("<p><b>Not found</b> in either file.</p></div>")
+        return details_rows
 
     v1_map = dicts_by_key(v1_items or [], id_key)
     v2_map = dicts_by_key(v2_items or [], id_key)
 
-    added   = sorted(set(v2_map) - set(v1_map))
-    deleted = sorted(set(v1_map) - set(v2_map))
-    common  = sorted(set(v1_map) & set(v2_map))
-
-    # Skip rendering if truly nothing changed for this group
-    has_any = bool(added or deleted or any(paths_changed(v1_map[k], v2_map[k]) for k in common))
-    if not has_any:
-        html_parts.append("<p>No Added/Deleted/Modified items.</p></div>")
-        return "".join(html_parts), details_rows
+    k1 = v1_map.keys()
+    k2 = v2_map.keys()
+    added   = sorted(k2 - k1)
+    deleted = sorted(k1 - k2)
+    common  = sorted(k1 & k2)
 
-    html_parts.append("<table><tr><th>Group</th><th>Status</th><th>" + escape(id_key_label) + "</th><th>V1</th><th>V2</th></tr>")
+    # The table is opened by the first row to be written, so unchanged common items are
+    # diffed once, in the render loop, rather than in a separate has_any pass first
+    table_head = "<table><tr><th>Group</th><th>Status</th><th>" + _escape(id_key_label) + "</th><th>V1</th><th>V2</th></tr>"
+    table_open = bool(added or deleted)
+    if table_open:
+        write(table_head)
 
     for ident in added:
-        v2 = v2_map[ident]
-        html_parts.append(tr(
-            "status-added",
-            [
-                escape(title),
-                "Added",
-                "<code>" + escape(ident) + "</code>",
-                "",
-                "<div class='block'>" + render_with_path_highlights(v2, set()) + "</div>",
-            ],
-        ))
+        write(_ROW_ADDED.format(title=title_esc, ident=_escape(ident),
+                                body=render_with_path_highlights(v2_map[ident], _EMPTY_PATHS)))
 
     for ident in deleted:
-        v1 = v1_map[ident]
-        html_parts.append(tr(
-            "status-deleted",
-            [
-                escape(title),
-                "Deleted",
-                "<code>" + escape(ident) + "</code>",
-                "<div class='block'>" + render_with_path_highlights(v1, set()) + "</div>",
-                "",
-            ],
-        ))
+        write(_ROW_DELETED.format(title=title_esc, ident=_escape(ident),
+                                  body=render_with_path_highlights(v1_map[ident], _EMPTY_PATHS)))
 
     for ident in common:
         v1 = v1_map[ident]
@@ -301,71 +418,66 @@ def build_group_section(
         diffs = paths_changed(v1, v2, prefix="")
         if not diffs:
             continue  # unchanged -> omit
-        changed_paths = {p for p, _, _ in diffs}
-        v1_block = render_with_path_highlights(v1, changed_paths, "")
-        v2_block = render_with_path_highlights(v2, changed_paths, "")
-
-        html_parts.append(tr(
-            "status-modified",
-            [
-                escape(title),
-                "Modified",
-                "<code>" + escape(ident) + "</code>",
-                "<div class='block'>" + v1_block + "</div>",
-                "<div class='block'>" + v2_block + "</div>",
-            ],
-        ))
-
-        for path, old, new in diffs:
-            old_text = old if isinstance(old, str) else json.dumps(old, ensure_ascii=False)
-            new_text = new if isinstance(new, str) else json.dumps(new, ensure_ascii=False)
-            old_html = "<span class='value-diff'>" + escape(old_text) + "</span>" if old != "(missing)" else "<span class='missing'>(missing)</span>"
-            new_html = "<span class='value-diff'>" + escape(new_text) + "</span>" if new != "(missing)" else "<span class='missing'>(missing)</span>"
-            details_rows.append((ident, path, old_html, new_html))
-
-    html_parts.append("</table></div>")
-    return "".join(html_parts), details_rows
-
-def build_report(v1_path: Path, v2_path: Path) -> str:
+        if not table_open:
+            write(table_head)
+            table_open = True
+        changed_paths = set(map(_diff_path, diffs))
+        write(_ROW_MODIFIED.format(title=title_esc, ident=_escape(ident),
+                                   v1=render_with_path_highlights(v1, changed_paths, ""),
+                                   v2=render_with_path_highlights(v2, changed_paths, "")))
+
+        details_rows.extend([(ident, path, _detail_cell(old), _detail_cell(new)) for path, old, new in diffs])
+
+    if not table_open:
+        # Skip rendering if truly nothing changed for this group
+        write("<p>No Added/Deleted/Modified items.</p></div>")
+        return details_rows
+    write("</table></div>")
+    return details_rows
+
+def build_report(v1_path: Path, v2_path: Path, out_fp: TextIO) -> None:
+    """Write the HTML report to `out_fp` as it is produced (one table row at a time)."""
     j1 = load_json(v1_path)
     j2 = load_json(v2_path)
+    write = out_fp.write
 
     groups = [
-        ("arbitrary → services", "Service Name", "name", locate_arbitrary_services),
-        ("checkPermissions", "Action", "action", locate_check_permissions),
-        ("getPermissions", "Resource Type", "resourceType", locate_get_permissions),
+        ("arbitrary → services", "Service Name", "name", "arbitrary_services"),
+        ("checkPermissions", "Action", "action", "checkPermissions"),
+        ("getPermissions", "Resource Type", "resourceType", "getPermissions"),
     ]
 
+    found1 = locate_all(j1)
+    found2 = locate_all(j2)
+
     # Presence summary
     presence = []
-    for title, _, _, locator in groups:
-        v1_items = locator(j1)
-        v2_items = locator(j2)
+    for title, _, _, slot in groups:
+        v1_items = found1[slot]
+        v2_items = found2[slot]
         presence.append((title, v1_items is not None, v2_items is not None))
 
-    parts: List[str] = [
+    out_fp.writelines((
         "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>",
         "<title>Services, Check & Get Permissions Diff</title>",
         CSS,
         "</head><body>",
         "<h1>Services, Check & Get Permissions Diff</h1>",
         "<div class='section'><h2>Summary</h2><ul>",
-    ]
+    ))
 
     for title, p1, p2 in presence:
-        parts.append("<li><b>" + escape(title) + "</b>: " + ("present in V1" if p1 else "missing in V1") + " / " + ("present in V2" if p2 else "missing in V2") + "</li>")
-    parts.append("</ul><div class='small'>Compared files: <code>" + escape(str(v1_path)) + "</code> and <code>" + escape(str(v2_path)) + "</code></div></div>")
+        write("<li><b>" + _escape(title) + "</b>: " + ("present in V1" if p1 else "missing in V1") + " / " + ("present in V2" if p2 else "missing in V2") + "</li>")
+    write("</ul><div class='small'>Compared files: <code>" + escape(str(v1_path)) + "</code> and <code>" + escape(str(v2_path)) + "</code></div></div>")
 
     # Each group
-    for title, id_label, id_key, locator in groups:
-        v1_items = locator(j1)
-        v2_items = locator(j2)
-        main_html, details_rows = build_group_section(title, id_label, id_key, v1_items, v2_items)
-        parts.append(main_html)
-        parts.append(build_modified_details_table(title, id_label, details_rows))
-
-    parts.append("</body></html>")
-    return "".join(parts)
+    for title, id_label, id_key, slot in groups:
+        v1_items = found1[slot]
+        v2_items = found2[slot]
+        details_rows = build_group_section(title, id_label, id_key, v1_items, v2_items, write)
+        write(build_modified_details_table(title, id_label, details_rows))
+
+    write("</body></html>")
 
 # -----------------------
 # CLI
@@ -388,8 +500,16 @@ def main() -> None:
         raise SystemExit(f"Not found: {args.v1}")
     if not args.v2.exists():
         raise SystemExit(f"Not found: {args.v2}")
-    html = build_report(args.v1, args.v2)
-    args.output.write_text(html, encoding="utf-8")
+    # Stream into a sibling temp file and swap it in at the end, so invalid input or a
+    # failure mid-render leaves any previous report untouched
+    tmp = args.output.with_name(f".{args.output.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as fp:
+            build_report(args.v1, args.v2, fp)
+        os.replace(tmp, args.output)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
     print("Report saved to:", args.output.resolve())
 
 if __name__ == "__main__":
@@ -1,31 +1,79 @@
 
 from __future__ import annotations
+import http.client
 import time
-import json
 import webbrowser
 from typing import Dict, Optional
 from urllib import request, parse, error
 
+from .discovery import loads_bytes
+
 DEFAULT_UA = "json-diff-report/1.1"
 
 class OAuthDeviceError(RuntimeError):
     pass
 
-def _post_form(url: str, data: Dict[str, str], headers: Optional[Dict[str,str]] = None, timeout: int = 30) -> Dict:
+def _post_form(url: str, data: Dict[str, str], headers: Optional[Dict[str,str]] = None, timeout: int = 30,
+               conn: Optional[http.client.HTTPConnection] = None) -> Dict:
+    """POST a form and decode the JSON reply. With conn, the request goes over that
+    (kept-alive) connection to url's host; redirects are left to urlopen."""
     body = parse.urlencode(data).encode("utf-8")
     hdrs = {"User-Agent": DEFAULT_UA, "Accept": "application/json", "Content-Type": "application/x-www-form-urlencoded"}
     if headers:
         hdrs.update(headers)
+    if conn is not None:
+        raw = _post_over(conn, url, body, hdrs)
+        if raw is not None:
+            return _json_reply(raw)
+        # Redirected: let urllib follow it, as it would without a kept-alive connection
     req = request.Request(url, data=body, headers=hdrs, method="POST")
     try:
         with request.urlopen(req, timeout=timeout) as resp:
-            txt = resp.read().decode("utf-8", errors="replace")
-            return json.loads(txt)
+            raw = resp.read()
     except error.HTTPError as e:
         msg = e.read().decode("utf-8", errors="replace") if hasattr(e, "read") else str(e)
         raise OAuthDeviceError(f"HTTPError {e.code}: {msg}") from e
     except error.URLError as e:
         raise OAuthDeviceError(f"URLError: {e}") from e
+    return _json_reply(raw)
+
+def _json_reply(raw: bytes) -> Dict:
+    try:
+        return loads_bytes(raw)
+    except ValueError as e:
+        raise OAuthDeviceError(f"Unexpected non-JSON response: {raw[:200].decode('utf-8', errors='replace')}") from e
+
+def _post_over(conn: http.client.HTTPConnection, url: str, body: bytes, hdrs: Dict[str, str]) -> Optional[bytes]:
+    """Reply body of a POST over conn, or None for a 3xx (the caller redoes it via urlopen)."""
+    u = parse.urlsplit(url)
+    target = (u.path or "/") + ("?" + u.query if u.query else "")
+    while True:
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", target, body=body, headers=hdrs)
+            resp = conn.getresponse()
+            raw = resp.read()
+            break
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            if not reused:
+                raise OAuthDeviceError(f"URLError: {e}") from e
+            # The server may have closed the idle kept-alive socket; retry on a fresh one
+    if resp.will_close:
+        conn.close()
+    if 300 <= resp.status < 400:
+        return None
+    if resp.status >= 400:
+        raise OAuthDeviceError(f"HTTPError {resp.status}: {raw.decode('utf-8', errors='replace')}")
+    return raw
+
+def _open_connection(url: str, timeout: int = 30) -> Optional[http.client.HTTPConnection]:
+    """Keep-alive connection to url's host, or None when urllib should handle it (proxy, odd scheme)."""
+    u = parse.urlsplit(url)
+    if request.getproxies() or u.scheme not in ("http", "https"):
+        return None
+    cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+    return cls(u.netloc, timeout=timeout)
 
 def start_device_flow(client_id: str, scope: str, open_browser: bool = True, base_url: Optional[str] = None) -> Dict[str, str]:
     """Start device code flow. Returns dict with device_code, user_code, verification_uri, expires_in, interval.
@@ -43,27 +91,32 @@ def start_device_flow(client_id: str, scope: str, open_browser: bool = True, bas
 def poll_for_token(client_id: str, device_code: str, interval: int = 5, timeout_seconds: int = 600, base_url: Optional[str] = None) -> str:
     """Poll token endpoint until access_token is returned or timeout. Returns access_token string."""
     token_endpoint = (base_url.rstrip('/') + "/login/oauth/access_token") if base_url else "https://github.com/login/oauth/access_token"
-    start = time.time()
-    while True:
-        resp = _post_form(token_endpoint, {
-            "client_id": client_id,
-            "device_code": device_code,
-            "grant_type": "urn:ietf:params:oauth:grant-type:device_code"
-        })
-        if "access_token" in resp:
-            return resp["access_token"]
-        err = resp.get("error")
-        if err == "authorization_pending":
-            time.sleep(interval)
-            if time.time() - start > timeout_seconds:
-                raise OAuthDeviceError("Device flow polling timed out.")
-            continue
-        if err == "slow_down":
-            interval += 5
-            time.sleep(interval)
-            if time.time() - start > timeout_seconds:
-                raise OAuthDeviceError("Device flow polling timed out.")
-            continue
-        if err in ("expired_token", "access_denied", "unsupported_grant_type", "incorrect_client_credentials"):
-            raise OAuthDeviceError(f"OAuth device flow error: {err}")
-        raise OAuthDeviceError(f"Unexpected token response: {resp}")
+    deadline = time.monotonic() + timeout_seconds
+    conn = _open_connection(token_endpoint)  # one TLS handshake for the whole poll loop
+    try:
+        while True:
+            resp = _post_form(token_endpoint, {
+                "client_id": client_id,
+                "device_code": device_code,
+                "grant_type": "urn:ietf:params:oauth:grant-type:device_code"
+            }, conn=conn)
+            if "access_token" in resp:
+                return resp["access_token"]
+            err = resp.get("error")
+            if err == "authorization_pending":
+                time.sleep(interval)
+                if time.monotonic() > deadline:
+                    raise OAuthDeviceError("Device flow polling timed out.")
+                continue
+            if err == "slow_down":
+                interval += 5
+                time.sleep(interval)
+                if time.monotonic() > deadline:
+                    raise OAuthDeviceError("Device flow polling timed out.")
+                continue
+            if err in ("expired_token", "access_denied", "unsupported_grant_type", "incorrect_client_credentials"):
+                raise OAuthDeviceError(f"OAuth device flow error: {err}")
+            raise OAuthDeviceError(f"Unexpected token response: {resp}")
+    finally:
+        if conn is not None:
+            conn.close()
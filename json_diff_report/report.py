@@ -1,163 +1,166 @@
 
 from __future__ import annotations
+import io
 import json
+from functools import lru_cache
+from operator import itemgetter
 from html import escape
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
-from .discovery import load_json
+from .discovery import LOCATOR_KEYS, find_first_keys, load_json
 from .diffing import dicts_by_key, paths_changed
-from .html_render import CSS, render_with_path_highlights, tr, build_modified_details_table
+from .html_render import CSS, _JSON_PRIMS, _escape, render_with_path_highlights, build_modified_details_table
 from .groups import GroupSpec, GROUPS
 
+_HTML_PROLOGUE = (
+    "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>"
+    "<title>Services, Check & Get Permissions Diff</title>"
+    + CSS +
+    "</head><body>"
+    "<h1>Services, Check & Get Permissions Diff</h1>"
+    "<div class='section'><h2>Summary</h2><ul>"
+)
+_HTML_EPILOGUE = "</body></html>"
+
+_diff_path = itemgetter(0)  # (path, old, new) -> path
+_BLOCK_OPEN = "<div class='block'>"
+_BLOCK_CLOSE = "</div>"
+_EMPTY_PATHS: frozenset = frozenset()  # Added/Deleted blocks: nothing highlighted
+
+def _plain_block(item: Dict[str, Any]) -> str:
+    """Added/Deleted block: the item rendered without highlights."""
+    return f"{_BLOCK_OPEN}{render_with_path_highlights(item, _EMPTY_PATHS)}{_BLOCK_CLOSE}"
+
+def _detail_html(v: Any) -> str:
+    if v == "(missing)":
+        return "<span class='missing'>(missing)</span>"
+    prim = _JSON_PRIMS.get(type(v))
+    if prim is not None:
+        text = prim(v)  # bool/None/number text has nothing to escape
+    else:
+        text = escape(v if type(v) is str else json.dumps(v, ensure_ascii=False))
+    return "<span class='value-diff'>" + text + "</span>"
+
+_detail_html_cached = lru_cache(maxsize=4096, typed=True)(_detail_html)  # typed: keep True/1 apart
+_CACHEABLE_TYPES = frozenset((str, int, bool, type(None)))  # not float: -0.0 == 0.0
+
+def _detail_cell(v: Any) -> str:
+    """Details-table cell for an old/new value; repeated scalars (flags, enums, names) are cached."""
+    return _detail_html_cached(v) if type(v) in _CACHEABLE_TYPES else _detail_html(v)
+
+@lru_cache(maxsize=None)
+def _section_html(spec: GroupSpec) -> Tuple[str, str, str, str, str]:
+    """Spec-constant HTML, built once per GroupSpec (they are frozen): the section heading,
+    the table header, and each status row's fixed cells up to the opening <code> of the ident."""
+    title_esc = escape(spec.title)
+    return (
+        f"<div class='section'><h2>{title_esc}</h2>",
+        f"<table><tr><th>Group</th><th>Status</th><th>{escape(spec.id_key_label)}</th><th>V1</th><th>V2</th></tr>",
+        f"<tr class='status-added'><td>{title_esc}</td><td>Added</td><td><code>",
+        f"<tr class='status-deleted'><td>{title_esc}</td><td>Deleted</td><td><code>",
+        f"<tr class='status-modified'><td>{title_esc}</td><td>Modified</td><td><code>",
+    )
+
 def build_group_section(
     spec: GroupSpec,
     v1_items: Optional[List[Dict[str, Any]]],
     v2_items: Optional[List[Dict[str, Any]]],
-) -> Tuple[str, List[Tuple[str, str, str, str]]]:
-    html: List[str] = ["<div class='section'><h2>" + escape(spec.title) + "</h2>"]
+    buf: io.StringIO,
+) -> List[Tuple[str, str, str, str]]:
+    """Write the group's section to `buf`; returns the rows for its Modified details table."""
+    write = buf.write
+    heading, table_head, added_head, deleted_head, modified_head = _section_html(spec)
+    write(heading)
     details_rows: List[Tuple[str, str, str, str]] = []
 
     if v1_items is None and v2_items is None:
-        html.append("<p><b>Not found</b> in either file.</p></div>")
-        return "".join(html), details_rows
+        write("<p><b>Not found</b> in either file.</p></div>")
+        return details_rows
 
     v1_map = dicts_by_key(v1_items or [], spec.id_key)
     v2_map = dicts_by_key(v2_items or [], spec.id_key)
 
-    added   = sorted(set(v2_map) - set(v1_map))
-    deleted = sorted(set(v1_map) - set(v2_map))
-    common  = sorted(set(v1_map) & set(v2_map))
-
-    has_any = bool(added or deleted or any(paths_changed(v1_map[k], v2_map[k]) for k in common))
-    if not has_any:
-        html.append("<p>No Added/Deleted/Modified items.</p></div>")
-        return "".join(html), details_rows
-
-    html.append("<table><tr><th>Group</th><th>Status</th><th>" + escape(spec.id_key_label) + "</th><th>V1</th><th>V2</th></tr>")
-
-    for ident in added:
-        v2 = v2_map[ident]
-        html.append(tr(
-            "status-added",
-            [
-                escape(spec.title),
-                "Added",
-                "<code>" + escape(ident) + "</code>",
-                "",
-                "<div class='block'>" + render_with_path_highlights(v2, set()) + "</div>",
-            ],
-        ))
-
-    for ident in deleted:
-        v1 = v1_map[ident]
-        html.append(tr(
-            "status-deleted",
-            [
-                escape(spec.title),
-                "Deleted",
-                "<code>" + escape(ident) + "</code>",
-                "<div class='block'>" + render_with_path_highlights(v1, set()) + "</div>",
-                "",
-            ],
-        ))
-
-    for ident in common:
-        v1 = v1_map[ident]
-        v2 = v2_map[ident]
-        diffs = paths_changed(v1, v2, prefix="")
-        if not diffs:
-            continue
-        changed_paths = {p for p, _, _ in diffs}
+    # One sorted walk over the key union classifies every ident and carries its items along,
+    # so the emission loops never probe the maps again; common items are diffed here, once
+    added: List[Tuple[str, Dict[str, Any]]] = []
+    deleted: List[Tuple[str, Dict[str, Any]]] = []
+    modified: List[Tuple[str, Dict[str, Any], Dict[str, Any], List[Tuple[str, Any, Any]]]] = []
+    for ident in sorted(v1_map.keys() | v2_map.keys()):
+        v1 = v1_map.get(ident)  # map values are always dicts, so None means absent
+        v2 = v2_map.get(ident)
+        if v1 is None:
+            added.append((ident, v2))
+        elif v2 is None:
+            deleted.append((ident, v1))
+        elif diffs := paths_changed(v1, v2, prefix=""):
+            modified.append((ident, v1, v2, diffs))
+
+    if not (added or deleted or modified):
+        write("<p>No Added/Deleted/Modified items.</p></div>")
+        return details_rows
+
+    write(table_head)
+
+    for ident, v2 in added:
+        write(f"{added_head}{_escape(ident)}</code></td><td></td><td>{_plain_block(v2)}</td></tr>")
+
+    for ident, v1 in deleted:
+        write(f"{deleted_head}{_escape(ident)}</code></td><td>{_plain_block(v1)}</td><td></td></tr>")
+
+    for ident, v1, v2, diffs in modified:
+        changed_paths = set(map(_diff_path, diffs))
         v1_block = render_with_path_highlights(v1, changed_paths, "")
         v2_block = render_with_path_highlights(v2, changed_paths, "")
+        write(f"{modified_head}{_escape(ident)}</code></td>"
+              f"<td>{_BLOCK_OPEN}{v1_block}{_BLOCK_CLOSE}</td><td>{_BLOCK_OPEN}{v2_block}{_BLOCK_CLOSE}</td></tr>")
+
+        details_rows.extend([(ident, path, _detail_cell(old), _detail_cell(new)) for path, old, new in diffs])
+
+    write("</table></div>")
+    return details_rows
+
+_Items = Optional[List[Dict[str, Any]]]
+
+def _locate_groups(j1: Any, j2: Any) -> List[Tuple[GroupSpec, _Items, _Items]]:
+    """Run every GroupSpec locator exactly once per file; the summary and the sections both read the result."""
+    return list(zip(GROUPS, _locate_all(j1), _locate_all(j2)))
+
+def _locate_all(root: Any) -> List[_Items]:
+    """Items for every group, in GROUPS order. toggles.* fast paths first; only if one of
+    them misses is the tree walked, once, for all the fallback keys."""
+    # Empty hits = fast path only (the fallback lookup finds nothing)
+    found = [spec.locator(root, {}) for spec in GROUPS]
+    if None in found:
+        hits = find_first_keys(root, LOCATOR_KEYS)
+        found = [items if items is not None else spec.locator(root, hits) for spec, items in zip(GROUPS, found)]
+    return found
 
-        html.append(tr(
-            "status-modified",
-            [
-                escape(spec.title),
-                "Modified",
-                "<code>" + escape(ident) + "</code>",
-                "<div class='block'>" + v1_block + "</div>",
-                "<div class='block'>" + v2_block + "</div>",
-            ],
-        ))
-
-        for path, old, new in diffs:
-            if isinstance(old, str):
-                old_text = old
-            else:
-                old_text = json.dumps(old, ensure_ascii=False)
-            if isinstance(new, str):
-                new_text = new
-            else:
-                new_text = json.dumps(new, ensure_ascii=False)
-            old_html = "<span class='value-diff'>" + escape(old_text) + "</span>" if old != "(missing)" else "<span class='missing'>(missing)</span>"
-            new_html = "<span class='value-diff'>" + escape(new_text) + "</span>" if new != "(missing)" else "<span class='missing'>(missing)</span>"
-            details_rows.append((ident, path, old_html, new_html))
-
-    html.append("</table></div>")
-    return "".join(html), details_rows
+def _build(j1: Any, j2: Any, compared_html: str) -> str:
+    """Shared body of build_report / build_report_from_objects; they differ only in the compared-inputs line."""
+    located = _locate_groups(j1, j2)
+
+    buf = io.StringIO()
+    write = buf.write
+    write(_HTML_PROLOGUE)
+
+    for spec, v1_items, v2_items in located:
+        write(f"<li><b>{escape(spec.title)}</b>: "
+              f"{'present in V1' if v1_items is not None else 'missing in V1'} / "
+              f"{'present in V2' if v2_items is not None else 'missing in V2'}</li>")
+    write(f"</ul><div class='small'>{compared_html}</div></div>")
+
+    for spec, v1_items, v2_items in located:
+        details_rows = build_group_section(spec, v1_items, v2_items, buf)
+        write(build_modified_details_table(spec.title, spec.id_key_label, details_rows))
+
+    write(_HTML_EPILOGUE)
+    return buf.getvalue()
 
 def build_report(v1_path: Path, v2_path: Path) -> str:
     j1 = load_json(v1_path)
     j2 = load_json(v2_path)
-
-    presence = []
-    for spec in GROUPS:
-        v1_items = spec.locator(j1)
-        v2_items = spec.locator(j2)
-        presence.append((spec.title, v1_items is not None, v2_items is not None))
-
-    parts: List[str] = [
-        "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>",
-        "<title>Services, Check & Get Permissions Diff</title>",
-        CSS,
-        "</head><body>",
-        "<h1>Services, Check & Get Permissions Diff</h1>",
-        "<div class='section'><h2>Summary</h2><ul>",
-    ]
-
-    for title, p1, p2 in presence:
-        parts.append("<li><b>" + escape(title) + "</b>: " + ("present in V1" if p1 else "missing in V1") + " / " + ("present in V2" if p2 else "missing in V2") + "</li>")
-    parts.append("</ul><div class='small'>Compared files: <code>" + escape(str(v1_path)) + "</code> and <code>" + escape(str(v2_path)) + "</code></div></div>")
-
-    for spec in GROUPS:
-        v1_items = spec.locator(j1)
-        v2_items = spec.locator(j2)
-        main_html, details_rows = build_group_section(spec, v1_items, v2_items)
-        parts.append(main_html)
-        parts.append(build_modified_details_table(spec.title, spec.id_key_label, details_rows))
-
-    parts.append("</body></html>")
-    return "".join(parts)
+    return _build(j1, j2, f"Compared files: <code>{escape(str(v1_path))}</code> and <code>{escape(str(v2_path))}</code>")
 
 def build_report_from_objects(j1, j2, source1: str = "V1", source2: str = "V2") -> str:
-    presence = []
-    for spec in GROUPS:
-        v1_items = spec.locator(j1)
-        v2_items = spec.locator(j2)
-        presence.append((spec.title, v1_items is not None, v2_items is not None))
-
-    parts: List[str] = [
-        "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>",
-        "<title>Services, Check & Get Permissions Diff</title>",
-        CSS,
-        "</head><body>",
-        "<h1>Services, Check & Get Permissions Diff</h1>",
-        "<div class='section'><h2>Summary</h2><ul>",
-    ]
-
-    for title, p1, p2 in presence:
-        parts.append("<li><b>" + escape(title) + "</b>: " + ("present in V1" if p1 else "missing in V1") + " / " + ("present in V2" if p2 else "missing in V2") + "</li>")
-    parts.append("</ul><div class='small'>Compared sources: <code>" + escape(source1) + "</code> and <code>" + escape(source2) + "</code></div></div>")
-
-    for spec in GROUPS:
-        v1_items = spec.locator(j1)
-        v2_items = spec.locator(j2)
-        main_html, details_rows = build_group_section(spec, v1_items, v2_items)
-        parts.append(main_html)
-        parts.append(build_modified_details_table(spec.title, spec.id_key_label, details_rows))
-
-    parts.append("</body></html>")
-    return "".join(parts)
+    return _build(j1, j2, f"Compared sources: <code>{escape(source1)}</code> and <code>{escape(source2)}</code>")